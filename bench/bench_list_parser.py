@@ -0,0 +1,88 @@
+"""Benchmark /vps/list parsing: full BeautifulSoup tree vs <tr>-only soup vs streaming parser.
+
+Usage: python bench/bench_list_parser.py [--sizes 100 1000 10000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from panel_parser import VPSRow, iter_vps_rows, parse_vps_rows_soup  # noqa: E402
+
+STATUSES = ('running', 'stopped', 'suspended')
+
+
+def build_page(rows):
+    """Render a panel-like /vps/list page with the given number of VPS rows."""
+    nav = ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(60))
+    body = ''.join(
+        f'<tr class="vps-row"><td>VPS{i:06d}</td><td><a href="/vps/VPS{i:06d}">node-{i}</a></td>'
+        f'<td><span class="badge">{STATUSES[i % 3]}</span></td><td>{1 + i % 16} GB</td>'
+        f'<td>{1 + i % 8} Cores</td><td>{10 * (1 + i % 20)} GB</td>'
+        f'<td><button class="btn">Manage</button></td></tr>\n'
+        for i in range(rows)
+    )
+    return (
+        f'<html><head><title>VPS List</title></head><body><nav><ul>{nav}</ul></nav>'
+        f'<table class="table"><thead><tr><th>ID</th><th>Name</th><th>Status</th><th>RAM</th>'
+        f'<th>CPU</th><th>Disk</th><th></th></tr></thead><tbody>\n{body}</tbody></table>'
+        f'<footer>GVM Panel</footer></body></html>'
+    )
+
+
+def parse_full_soup(text):
+    """The whole-document parse list_vps used before panel_parser."""
+    soup = BeautifulSoup(text, 'html.parser')
+    rows = []
+    for row in soup.find_all('tr')[1:]:
+        cells = row.find_all('td')
+        if len(cells) >= 6:
+            rows.append(VPSRow(*(cell.text.strip() for cell in cells[:6])))
+    return rows
+
+
+PARSERS = {
+    'full soup': parse_full_soup,
+    'tr soup': parse_vps_rows_soup,
+    'stream': lambda text: list(iter_vps_rows(text)),
+}
+
+
+def measure(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6}  {'parser':<10} {'time ms':>10} {'peak MiB':>10}")
+    for size in args.sizes:
+        text = build_page(size)
+        expected = parse_full_soup(text)
+        for label, func in PARSERS.items():
+            if func(text) != expected:
+                sys.exit(f"{label} output differs from the full soup parse at {size} rows")
+            seconds, peak = measure(func, text, args.repeat)
+            print(f"{size:>6}  {label:<10} {seconds * 1000:>10.1f} {peak / 2 ** 20:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
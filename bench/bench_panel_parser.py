@@ -0,0 +1,97 @@
+"""Micro-benchmark for panel_parser against the page fixtures in bench/fixtures.
+
+Usage: python bench/bench_panel_parser.py [--number N]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from panel_parser import is_success_page, parse_create_page, parse_ssh_page  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'bench', 'fixtures')
+
+_FLAGS = re.MULTILINE | re.DOTALL
+_LEGACY_CREATE = {
+    'vps_id': r'VPS ID:\s*[\r\n]+([A-Z0-9]+)',
+    'ssh_host': r'SSH Host:\s*[\r\n]+([\d.]+)',
+    'ssh_port': r'SSH Port:\s*[\r\n]+(\d+)',
+    'username': r'Username:\s*[\r\n]+(\w+)',
+    'password': r'Password:\s*[\r\n]+([^\n]+)',
+    'status': r'Status:\s*[\r\n]+(\w+)',
+    'memory': r'Memory\s*[\r\n]+(\d+\s*GB)',
+    'cpu': r'CPU\s*[\r\n]+(\d+\s*Cores)',
+    'disk': r'Disk\s*[\r\n]+(\d+\s*GB)',
+    'os': r'OS\s*[\r\n]+([^\n]+)',
+}
+
+
+def legacy_create(text):
+    """The search-twice-per-field parsing create_vps used before panel_parser."""
+    if not any(keyword in text.lower() for keyword in ['successfully', 'created', 'success']):
+        return None
+    return {
+        field: re.search(pattern, text, _FLAGS).group(1).strip() if re.search(pattern, text, _FLAGS) else None
+        for field, pattern in _LEGACY_CREATE.items()
+    }
+
+
+def legacy_ssh(text):
+    host = re.search(r'SSH Host:\s*([\d.]+)', text).group(1) if re.search(r'SSH Host:\s*([\d.]+)', text) else None
+    port = re.search(r'SSH Port:\s*(\d+)', text).group(1) if re.search(r'SSH Port:\s*(\d+)', text) else None
+    return {'host': host, 'port': port}
+
+
+def current_create(text):
+    if not is_success_page(text):
+        return None
+    return vars(parse_create_page(text))
+
+
+def current_ssh(text):
+    return vars(parse_ssh_page(text))
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def bench(label, func, text, number):
+    best = min(timeit.repeat(lambda: func(text), number=number, repeat=5))
+    per_call = best / number * 1e6
+    print(f"  {label:<8} {per_call:10.1f} us/call")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000, help='calls per timing run')
+    args = parser.parse_args()
+
+    # Fields where the current parser deliberately disagrees with legacy: (legacy value, current value).
+    # A label above the details block was picked up first by legacy; the details block now wins.
+    cases = [
+        ('create_vps_success.html', legacy_create, current_create, {}),
+        ('create_vps_banner.html', legacy_create, current_create, {'status': ('Online', 'Running')}),
+        ('vps_ssh.html', legacy_ssh, current_ssh, {}),
+    ]
+    for fixture, legacy, current, changed in cases:
+        text = read_fixture(fixture)
+        old_out, new_out = legacy(text), current(text)
+        expected = {**old_out, **{field: values[1] for field, values in changed.items()}}
+        legacy_seen = {field: old_out[field] for field in changed}
+        if new_out != expected or legacy_seen != {field: values[0] for field, values in changed.items()}:
+            sys.exit(f"{fixture}: parser output differs from legacy\n  legacy:  {old_out}\n  current: {new_out}")
+        print(f"{fixture} ({len(text)} bytes)")
+        old = bench('legacy', legacy, text, args.number)
+        new = bench('current', current, text, args.number)
+        print(f"  speedup  {old / new:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Measure cold-start import time of bot.py and v2.py in fresh interpreters.
+
+Reports the median wall time to import each bot module and the slowest
+imports behind it (from python -X importtime), and flags heavy optional
+modules (bs4, psutil, aiohttp.web) that should not load at startup.
+
+Usage: python bench/bench_startup.py [--runs 5] [--top 8]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ('bs4', 'psutil', 'aiohttp.web')
+
+PROBE = f'''
+import sys, time
+sys.path.insert(0, {ROOT!r})
+start = time.perf_counter()
+import {{module}}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))
+'''
+
+
+def run_probe(module, cwd, importtime=False):
+    args = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE.format(module=module)]
+    # Scratch cwd: importing the bots creates log listeners and looks for local state files
+    return subprocess.run(args, cwd=cwd, capture_output=True, text=True, check=True)
+
+
+def slowest_imports(stderr, module, top):
+    """Direct imports of module by cumulative microseconds, from -X importtime output."""
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                return sorted(children, reverse=True)[:top]
+            children = []
+        elif depth == 1:
+            children.append((int(cumulative), name.strip()))
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--modules', nargs='+', default=['bot', 'v2'])
+    args = parser.parse_args()
+
+    cwd = tempfile.mkdtemp(prefix='gvm-startup-')
+    for module in args.modules:
+        run_probe(module, cwd)  # Warm the page cache and bytecode caches first
+        timings, loaded = [], ''
+        for _ in range(args.runs):
+            elapsed, _, loaded = run_probe(module, cwd).stdout.strip().partition(' ')
+            timings.append(float(elapsed))
+        print(f"{module}: median {statistics.median(timings) * 1000:.1f} ms, "
+              f"min {min(timings) * 1000:.1f} ms over {args.runs} runs")
+        print(f"  heavy optional modules loaded at import: {loaded or 'none'}")
+        for cumulative, name in slowest_imports(run_probe(module, cwd, importtime=True).stderr, module, args.top):
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Load-test the command handlers of both bots against the local mock servers.
+
+The handlers are called directly with stand-in Discord contexts and
+interactions, so no Discord connection is needed. Every scenario runs
+``--requests`` calls with ``--concurrency`` in flight and reports
+p50/p95/p99 latency, errors and throughput.
+
+Usage: python bench/loadtest.py [--requests 200] [--concurrency 20] [--latency-ms 20,80]
+                                [--error-rate 0.05] [--rate-limit-rate 0.02] [--max-p99-ms 500]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_servers import MockConfig, add_config_args, cloudflare_app, panel_app, start_app  # noqa: E402
+
+ERROR_PREFIXES = ('❌', '⚠️')
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None):
+        self.channel = channel
+        self.id = random.getrandbits(48)
+        self.content = content
+
+    async def edit(self, content=None, **kwargs):
+        self.content = content
+
+
+class FakeChannel:
+    id = 1
+
+    def __init__(self):
+        self.sent: List[str] = []
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        self.sent.append(content if content is not None else (embed.title if embed else ''))
+        return FakeMessage(self, content)
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+    def __str__(self):
+        return f'loadtest#{self.id}'
+
+
+class FakeContext:
+    """Enough of commands.Context for the v2.py prefix commands."""
+    def __init__(self, user_id: int):
+        self.author = FakeUser(user_id)
+        self.channel = FakeChannel()
+        self.send = self.channel.send
+
+
+class FakeResponse:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, content=None, **kwargs):
+        await self.channel.send(content, **kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeInteraction:
+    """Enough of discord.Interaction for slash commands and view buttons."""
+    def __init__(self, user_id: int):
+        self.user = FakeUser(user_id)
+        self.channel = FakeChannel()
+        self.response = FakeResponse(self.channel)
+        self.followup = FakeFollowup(self.channel)
+        self.extras: Dict = {}
+        self.namespace = SimpleNamespace(domain=None)
+
+
+def failed(reply) -> bool:
+    return reply is None or str(reply).startswith(ERROR_PREFIXES)
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scenario(name: str, op: Callable[[int], Awaitable[bool]], requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                ok = await op(i)
+            except Exception as e:
+                logging.getLogger('loadtest').warning(f'{name} #{i}: {type(e).__name__}: {e}')
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {'scenario': name, 'requests': requests, 'errors': errors,
+            'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99), 'max': latencies[-1], 'rps': requests / elapsed}
+
+
+def print_report(results: List[dict]):
+    print(f"{'scenario':<18}{'reqs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>10}")
+    for r in results:
+        print(f"{r['scenario']:<18}{r['requests']:>6}{r['errors']:>8}{r['p50'] * 1000:>10.1f}{r['p95'] * 1000:>10.1f}"
+              f"{r['p99'] * 1000:>10.1f}{r['max'] * 1000:>10.1f}{r['rps']:>10.1f}")
+
+
+async def main(args) -> int:
+    # Errors are injected only once setup is done, so they can't abort a run before it starts
+    config = MockConfig(args.latency_ms)
+    panel = panel_app(config, args.vps)
+    panel_runner = await start_app(panel, '127.0.0.1', 0)
+    cf_runner = await start_app(cloudflare_app(config), '127.0.0.1', 0)
+    panel_url = 'http://127.0.0.1:%d' % panel_runner.addresses[0][1]
+    cf_url = 'http://127.0.0.1:%d/client/v4' % cf_runner.addresses[0][1]
+
+    # Snapshot, job and SQLite files land in a scratch directory, not the checkout
+    os.chdir(tempfile.mkdtemp(prefix='gvm-loadtest-'))
+    import cloudflare_api
+    import v2
+    import bot as dns_bot
+    logging.getLogger().setLevel(logging.WARNING)
+
+    v2.panel.base_url = panel_url
+    cloudflare_api.API_BASE = cf_url
+    # The mock has no quota, so lift the client-side limit unless asked to keep it
+    dns_bot.cloudflare.limiter = cloudflare_api.TokenBucket(args.cf_rate, max(1, int(args.cf_rate)))
+
+    admin_id = int(v2.ADMIN_USER_ID)
+    domain = dns_bot.DOMAIN_LIST[0]
+    vps_ids = list(panel['vps'])
+    if not vps_ids:
+        print('Mock panel has no VPS rows, use --vps 1 or more')
+        return 2
+    if not await v2.panel.ensure_login():
+        print('Could not log in to the mock panel')
+        return 1
+    config.error_rate, config.rate_limit_rate = args.error_rate, args.rate_limit_rate
+
+    async def listvps(i):
+        ctx = FakeContext(admin_id)
+        await v2.listvps.callback(ctx)
+        return not failed(ctx.channel.sent[-1])
+
+    async def listall(i):
+        ctx = FakeContext(admin_id)
+        await v2.listall.callback(ctx)
+        return not failed(ctx.channel.sent[-1])
+
+    async def restart(i):
+        interaction = FakeInteraction(admin_id)
+        view = v2.ManageView(random.choice(vps_ids))
+        await view.restart_button.callback(interaction)
+        return not failed(interaction.channel.sent[-1])
+
+    async def ssh(i):
+        interaction = FakeInteraction(admin_id)
+        view = v2.ManageView(random.choice(vps_ids))
+        await view.ssh_button.callback(interaction)
+        return not failed(interaction.channel.sent[-1])
+
+    async def create_vps(i):
+        details = await v2.create_vps(f'lt-{i}', 1, 1, 10, 'ubuntu', 'loadtest', '')
+        return 'error' not in details
+
+    async def dns_create(i):
+        interaction = FakeInteraction(admin_id)
+        await dns_bot.create.callback(interaction, domain, f'lt{i}', f'10.0.{i // 256 % 256}.{i % 256}')
+        return not failed(interaction.channel.sent[-1])
+
+    async def dns_autocomplete(i):
+        interaction = FakeInteraction(admin_id)
+        interaction.namespace.domain = domain
+        return bool(await dns_bot.record_name_autocomplete(interaction, f'lt{i % 10}'))
+
+    async def dns_delete(i):
+        interaction = FakeInteraction(admin_id)
+        await dns_bot.delete.callback(interaction, domain, f'lt{i}')
+        return not failed(interaction.channel.sent[-1])
+
+    scenarios = {'listvps': listvps, 'listall': listall, 'restart': restart, 'ssh': ssh,
+                 'create_vps': create_vps, 'dns_create': dns_create,
+                 'dns_autocomplete': dns_autocomplete, 'dns_delete': dns_delete}
+    selected = args.scenarios.split(',') if args.scenarios else list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(unknown)}. Choose from {', '.join(scenarios)}")
+        return 2
+
+    results = []
+    try:
+        for name in selected:
+            results.append(await run_scenario(name, scenarios[name], args.requests, args.concurrency))
+    finally:
+        await v2.close_session()
+        await dns_bot.cloudflare.close()
+        await panel_runner.cleanup()
+        await cf_runner.cleanup()
+        v2.log_listener.stop()
+
+    print_report(results)
+    if args.max_p99_ms is not None:
+        slow = [r['scenario'] for r in results if r['p99'] * 1000 > args.max_p99_ms]
+        if slow:
+            print(f"p99 above {args.max_p99_ms} ms: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='calls per scenario')
+    parser.add_argument('--concurrency', type=int, default=20, help='calls in flight per scenario')
+    parser.add_argument('--scenarios', default='', help='comma-separated subset to run (default: all)')
+    parser.add_argument('--vps', type=int, default=200, help='VPS rows the mock panel starts with')
+    parser.add_argument('--cf-rate', type=float, default=1000.0,
+                        help='Cloudflare client requests/second (the bot default is 4)')
+    parser.add_argument('--max-p99-ms', type=float, default=None, help='exit 1 if any scenario p99 exceeds this')
+    add_config_args(parser)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,252 @@
+"""Local stand-ins for the GVM panel and the Cloudflare DNS API.
+
+Both servers are plain aiohttp apps with configurable latency, error rate and
+(for Cloudflare) 429 responses, so the bots can be load-tested offline.
+
+Usage: python bench/mock_servers.py [--panel-port 8800] [--cf-port 8801] [--latency-ms 20,80]
+Point v2.py's PANEL_URL at http://127.0.0.1:8800 and cloudflare_api.API_BASE at
+http://127.0.0.1:8801/client/v4.
+"""
+import argparse
+import asyncio
+import random
+import secrets
+import string
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+from aiohttp import web
+
+STATUSES = ('running', 'stopped', 'suspended')
+
+
+@dataclass
+class MockConfig:
+    latency: Tuple[float, float] = (0.02, 0.08)  # Seconds, uniformly distributed
+    error_rate: float = 0.0  # Fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # Fraction of Cloudflare requests answered with 429
+    retry_after: int = 1
+
+
+@web.middleware
+async def _chaos(request: web.Request, handler):
+    config: MockConfig = request.app['config']
+    await asyncio.sleep(random.uniform(*config.latency))
+    if config.error_rate and random.random() < config.error_rate:
+        return web.Response(status=500, text='Internal Server Error')
+    if request.app['kind'] == 'cloudflare' and config.rate_limit_rate and random.random() < config.rate_limit_rate:
+        return web.json_response(
+            {'success': False, 'errors': [{'code': 971, 'message': 'Please wait and consider throttling your request speed'}]},
+            status=429, headers={'Retry-After': str(config.retry_after)},
+        )
+    return await handler(request)
+
+
+# ----------- GVM panel -----------
+
+def _vps_id() -> str:
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+
+
+def panel_app(config: MockConfig, vps_count: int = 200) -> web.Application:
+    app = web.Application(middlewares=[_chaos])
+    app['config'] = config
+    app['kind'] = 'panel'
+    app['sessions'] = set()
+    app['vps'] = {
+        _vps_id(): {'name': f'node-{i}', 'status': STATUSES[i % 3], 'memory': f'{1 + i % 16} GB',
+                    'cpu': f'{1 + i % 8} Cores', 'disk': f'{10 * (1 + i % 20)} GB'}
+        for i in range(vps_count)
+    }
+
+    def logged_in(request: web.Request) -> bool:
+        return request.cookies.get('session') in request.app['sessions']
+
+    def require_login(handler):
+        async def wrapped(request: web.Request):
+            if not logged_in(request):
+                raise web.HTTPFound('/login')
+            return await handler(request)
+        return wrapped
+
+    async def login_page(request):
+        return web.Response(text='<form action="/login" method="post"><input name="password"></form>',
+                            content_type='text/html')
+
+    async def login(request):
+        data = await request.post()
+        if not data.get('username'):
+            return web.Response(status=401, text='Invalid credentials')
+        token = secrets.token_hex(16)
+        request.app['sessions'].add(token)
+        response = web.Response(text='Login success - dashboard', content_type='text/html')
+        response.set_cookie('session', token)
+        return response
+
+    @require_login
+    async def create_vps(request):
+        data = await request.post()
+        vps_id = _vps_id()
+        request.app['vps'][vps_id] = {'name': data.get('name', ''), 'status': 'running',
+                                      'memory': f"{data.get('memory', 1)} GB", 'cpu': f"{data.get('cpu', 1)} Cores",
+                                      'disk': f"{data.get('disk', 10)} GB"}
+        port = 20000 + len(request.app['vps'])
+        text = (
+            '<div class="alert">VPS created successfully!</div><pre>\n'
+            f'VPS ID:\n{vps_id}\nSSH Host:\n127.0.0.1\nSSH Port:\n{port}\nUsername:\nroot\n'
+            f'Password:\n{secrets.token_urlsafe(12)}\nStatus:\nRunning\n'
+            f"Memory\n{data.get('memory', 1)} GB\nCPU\n{data.get('cpu', 1)} Cores\n"
+            f"Disk\n{data.get('disk', 10)} GB\nOS\n{data.get('os', 'ubuntu')}\n</pre>"
+        )
+        return web.Response(text=text, content_type='text/html')
+
+    @require_login
+    async def vps_list(request):
+        rows = ''.join(
+            f"<tr><td>{vps_id}</td><td>{vps['name']}</td><td>{vps['status']}</td>"
+            f"<td>{vps['memory']}</td><td>{vps['cpu']}</td><td>{vps['disk']}</td></tr>"
+            for vps_id, vps in request.app['vps'].items()
+        )
+        text = ('<table><tr><th>ID</th><th>Name</th><th>Status</th><th>RAM</th><th>CPU</th><th>Disk</th></tr>'
+                f'{rows}</table>')
+        return web.Response(text=text, content_type='text/html')
+
+    @require_login
+    async def vps_action(request):
+        vps = request.app['vps'].get(request.match_info['vps_id'])
+        action = request.match_info['action']
+        if vps is None:
+            return web.Response(status=404, text='VPS not found')
+        if action == 'delete':
+            del request.app['vps'][request.match_info['vps_id']]
+        elif action in ('start', 'restart'):
+            vps['status'] = 'running'
+        elif action == 'stop':
+            vps['status'] = 'stopped'
+        return web.Response(text=f'{action} success')
+
+    @require_login
+    async def vps_ssh(request):
+        if request.match_info['vps_id'] not in request.app['vps']:
+            return web.Response(status=404, text='VPS not found')
+        return web.Response(text='<p>SSH Host: 127.0.0.1</p><p>SSH Port: 22022</p>', content_type='text/html')
+
+    @require_login
+    async def add_user(request):
+        data = await request.post()
+        return web.Response(text=f"User {data.get('username')} added successfully")
+
+    app.router.add_get('/login', login_page)
+    app.router.add_post('/login', login)
+    app.router.add_post('/create_vps', create_vps)
+    app.router.add_get('/vps/list', vps_list)
+    app.router.add_get('/vps/{vps_id}/ssh', vps_ssh)
+    app.router.add_post('/vps/{vps_id}/{action}', vps_action)
+    app.router.add_post('/users/add', add_user)
+    return app
+
+
+# ----------- Cloudflare -----------
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def cloudflare_app(config: MockConfig) -> web.Application:
+    app = web.Application(middlewares=[_chaos])
+    app['config'] = config
+    app['kind'] = 'cloudflare'
+    app['zones']: Dict[str, Dict[str, dict]] = {}
+
+    def envelope(result, **extra):
+        return web.json_response({'success': True, 'errors': [], 'messages': [], 'result': result, **extra})
+
+    def not_found():
+        return web.json_response({'success': False, 'errors': [{'code': 81044, 'message': 'Record does not exist.'}]},
+                                 status=404)
+
+    async def list_records(request):
+        records = list(request.app['zones'].get(request.match_info['zone'], {}).values())
+        name = request.query.get('name')
+        if name:
+            records = [record for record in records if record['name'] == name.lower()]
+        page = int(request.query.get('page', 1))
+        per_page = int(request.query.get('per_page', 100))
+        total_pages = max(1, -(-len(records) // per_page))
+        return envelope(records[(page - 1) * per_page:page * per_page],
+                        result_info={'page': page, 'per_page': per_page, 'total_pages': total_pages,
+                                     'total_count': len(records)})
+
+    async def create_record(request):
+        data = await request.json()
+        record = {'id': secrets.token_hex(16), 'name': data['name'].lower(), 'type': data.get('type', 'A'),
+                  'content': data.get('content'), 'proxied': data.get('proxied', False), 'ttl': data.get('ttl', 1),
+                  'comment': data.get('comment'), 'modified_on': _now()}
+        request.app['zones'].setdefault(request.match_info['zone'], {})[record['id']] = record
+        return envelope(record)
+
+    async def update_record(request):
+        record = request.app['zones'].get(request.match_info['zone'], {}).get(request.match_info['record_id'])
+        if record is None:
+            return not_found()
+        data = await request.json()
+        record.update({key: value for key, value in data.items() if key in ('type', 'name', 'content', 'proxied', 'ttl', 'comment')})
+        record['modified_on'] = _now()
+        return envelope(record)
+
+    async def delete_record(request):
+        zone = request.app['zones'].get(request.match_info['zone'], {})
+        if zone.pop(request.match_info['record_id'], None) is None:
+            return not_found()
+        return envelope({'id': request.match_info['record_id']})
+
+    app.router.add_get('/client/v4/zones/{zone}/dns_records', list_records)
+    app.router.add_post('/client/v4/zones/{zone}/dns_records', create_record)
+    app.router.add_patch('/client/v4/zones/{zone}/dns_records/{record_id}', update_record)
+    app.router.add_delete('/client/v4/zones/{zone}/dns_records/{record_id}', delete_record)
+    return app
+
+
+async def start_app(app: web.Application, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def parse_latency(value: str) -> Tuple[float, float]:
+    low, _, high = value.partition(',')
+    return float(low) / 1000, float(high or low) / 1000
+
+
+def add_config_args(parser: argparse.ArgumentParser):
+    parser.add_argument('--latency-ms', type=parse_latency, default=(0.02, 0.08), help='min,max added latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of HTTP 500 answers')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of Cloudflare 429 answers')
+
+
+async def serve_forever(args):
+    config = MockConfig(args.latency_ms, args.error_rate, args.rate_limit_rate)
+    await start_app(panel_app(config, args.vps), args.host, args.panel_port)
+    await start_app(cloudflare_app(config), args.host, args.cf_port)
+    print(f'Mock panel on http://{args.host}:{args.panel_port}, '
+          f'Cloudflare on http://{args.host}:{args.cf_port}/client/v4')
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--panel-port', type=int, default=8800)
+    parser.add_argument('--cf-port', type=int, default=8801)
+    parser.add_argument('--vps', type=int, default=200, help='VPS rows the panel starts with')
+    add_config_args(parser)
+    try:
+        asyncio.run(serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
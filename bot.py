@@ -1,28 +1,105 @@
+import io
 import os
+import csv
+import json
 import time
+import hashlib
+import asyncio
 import discord
 import platform
-import psutil
-import aiohttp
 from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 
+from cloudflare_api import CloudflareClient
+from dns_index import RECORD_NOT_FOUND, RecordIndex, has_error
+from metrics import REGISTRY
+from sysmon import SystemSampler
+
 # Load .env file
 load_dotenv()
 
 DISCORD_TOKEN = ""
 CLOUDFLARE_API_TOKEN = "x7FWyMax7iQdDwszVJoZvwGumPhRmjLsk0tXVvWZ"
 
-# Multiple domains and zones support
-DOMAINS = "dragoncloud.qzz.io"
-ZONES = "0a7737b368f6caf89925a949086d2513"
+# Multiple domains and zones support: comma-separated, in the same order
+DOMAINS = os.getenv("DOMAINS", "dragoncloud.qzz.io")
+ZONES = os.getenv("ZONES", "0a7737b368f6caf89925a949086d2513")
 
-if len(DOMAINS) != len(ZONES):
+DOMAIN_LIST = [domain.strip().lower() for domain in DOMAINS.split(",") if domain.strip()]
+ZONE_LIST = [zone.strip() for zone in ZONES.split(",") if zone.strip()]
+if not DOMAIN_LIST or len(DOMAIN_LIST) != len(ZONE_LIST):
     raise ValueError("DOMAINS and ZONES must be in same order and count in .env file!")
 
+# Zone registry: domain -> Cloudflare zone id
+ZONE_IDS = dict(zip(DOMAIN_LIST, ZONE_LIST))
+
+# Discord shows at most 25 autocomplete choices
+AUTOCOMPLETE_LIMIT = 25
+
+# DNS record index snapshot and how often it is re-listed from Cloudflare (seconds)
+DNS_SNAPSHOT_FILE = "dns_records.json"
+DNS_RECONCILE_INTERVAL = 600
+
+# Hash of the last synced slash commands; the tree is only re-synced when it changes (delete to force)
+COMMAND_HASH_FILE = "command_tree.sha256"
+
+# Bulk CSV jobs: parallel Cloudflare calls per job and max rows per upload
+BULK_CONCURRENCY = 8
+BULK_MAX_ROWS = 5000
+BULK_PROGRESS_INTERVAL = 3
+
+# Prometheus /metrics endpoint (localhost only); set METRICS_PORT = 0 to disable
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9101
+
+# /botinfo system sampling: seconds between samples and seconds of history kept
+SAMPLE_INTERVAL = 10
+SAMPLE_WINDOW = 3600
+
+# One pooled Cloudflare client shared by every command
+cloudflare = CloudflareClient(CLOUDFLARE_API_TOKEN)
+records = RecordIndex(cloudflare, DNS_SNAPSHOT_FILE, DNS_RECONCILE_INTERVAL)
+
+
+class TimedCommandTree(app_commands.CommandTree):
+    """Command tree that times every slash command for the metrics registry."""
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.application_command and interaction.command:
+            interaction.extras["metrics_timer"] = REGISTRY.command(interaction.command.qualified_name)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        timer = interaction.extras.pop("metrics_timer", None)
+        if timer is not None:
+            timer.finish(failed=True)
+        await super().on_error(interaction, error)
+
+
+class DNSBot(commands.Bot):
+    metrics_runner = None
+
+    async def setup_hook(self):
+        await cloudflare.start()
+        await records.start(ZONE_IDS.values())
+        await sync_commands()
+        sampler.start()
+        if METRICS_PORT:
+            self.metrics_runner = await REGISTRY.serve(METRICS_HOST, METRICS_PORT)
+
+    async def close(self):
+        sampler.stop()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await records.stop()
+        await cloudflare.close()
+        await super().close()
+
+
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = DNSBot(command_prefix="!", intents=intents, tree_cls=TimedCommandTree)
+REGISTRY.gauge("discord_gateway_latency_seconds", lambda: bot.latency)
+sampler = SystemSampler(lambda: bot.latency, SAMPLE_INTERVAL, SAMPLE_WINDOW)
 
 # Track uptime
 start_time = time.time()
@@ -35,39 +112,201 @@ def get_uptime():
     return f"{days}d {hrs}h {mins}m {sec}s"
 
 
+def zone_for(domain):
+    return ZONE_IDS.get(domain.strip().lower())
+
+
 # ----------- Cloudflare Functions -----------
 
 async def create_record(zone_id, name, ip):
-    url = f"https://api.cloudflare.com/client/v4/zones/{zone_id}/dns_records"
-    headers = {"Authorization": f"Bearer {CLOUDFLARE_API_TOKEN}", "Content-Type": "application/json"}
-    json_data = {"type": "A", "name": name, "content": ip, "ttl": 120, "proxied": False}
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=json_data) as resp:
-            return await resp.json()
+    return await records.create(zone_id, {"type": "A", "name": name, "content": ip, "ttl": 120, "proxied": False})
 
 async def delete_record(zone_id, record_id):
-    url = f"https://api.cloudflare.com/client/v4/zones/{zone_id}/dns_records/{record_id}"
-    headers = {"Authorization": f"Bearer {CLOUDFLARE_API_TOKEN}", "Content-Type": "application/json"}
-
-    async with aiohttp.ClientSession() as session:
-        async with session.delete(url, headers=headers) as resp:
-            return await resp.json()
+    return await records.delete(zone_id, record_id)
 
 async def get_record(zone_id, name):
-    url = f"https://api.cloudflare.com/client/v4/zones/{zone_id}/dns_records?name={name}"
-    headers = {"Authorization": f"Bearer {CLOUDFLARE_API_TOKEN}", "Content-Type": "application/json"}
+    return await cloudflare.request("GET", f"/zones/{zone_id}/dns_records", params={"name": name})
+
+async def lookup_record(zone_id, name):
+    """Ask Cloudflare for a record the index doesn't know (or knows wrongly) and index it."""
+    data = await get_record(zone_id, name)
+    if data.get("success") and data["result"]:
+        record = data["result"][0]
+        records.add(zone_id, record)
+        return record
+    return None
+
+async def delete_record_by_name(zone_id, name):
+    """Delete a record using the cached id. Returns (record, response), record is None if not found."""
+    record = records.get(zone_id, name)
+    REGISTRY.cache("dns_index", record is not None)
+    if record is None:
+        record = await lookup_record(zone_id, name)
+        if record is None:
+            return None, None
+        return record, await delete_record(zone_id, record["id"])
+
+    deleted = await delete_record(zone_id, record["id"])
+    if not deleted.get("success") and has_error(deleted, RECORD_NOT_FOUND):
+        # Cached id is stale; drop it and retry with a fresh lookup. Other failures keep the cache as is
+        records.remove(zone_id, record["id"])
+        fresh = await lookup_record(zone_id, name)
+        if fresh is None:
+            return None, None
+        if fresh["id"] != record["id"]:
+            return fresh, await delete_record(zone_id, fresh["id"])
+    return record, deleted
+
+def format_errors(data):
+    errors = data.get("errors") or []
+    return "; ".join(str(e.get("message", e)) if isinstance(e, dict) else str(e) for e in errors) or "Unknown error"
+
+
+# ----------- Bulk Jobs -----------
+
+def parse_bulk_csv(raw, default_domain):
+    """Parse `name,ip[,domain]` rows. An optional `name,...` header and `#` comments are skipped."""
+    rows = []
+    for row in csv.reader(io.StringIO(raw.decode("utf-8-sig"))):
+        row = [cell.strip() for cell in row]
+        if not row or not row[0] or row[0].startswith("#"):
+            continue
+        if not rows and row[0].lower() == "name":
+            continue
+        ip = row[1] if len(row) > 1 else ""
+        domain = row[2] if len(row) > 2 and row[2] else default_domain
+        rows.append((row[0], ip, domain))
+    return rows
+
+async def bulk_create_one(name, ip, domain):
+    zone_id = zone_for(domain) if domain else None
+    if zone_id is None:
+        return False, f"Domain `{domain}` not found in bot config"
+    if not ip:
+        return False, "Missing IP"
+    data = await create_record(zone_id, f"{name}.{domain}", ip)
+    if data.get("success"):
+        return True, data["result"]["id"]
+    return False, format_errors(data)
+
+async def bulk_delete_one(name, ip, domain):
+    zone_id = zone_for(domain) if domain else None
+    if zone_id is None:
+        return False, f"Domain `{domain}` not found in bot config"
+    record, deleted = await delete_record_by_name(zone_id, f"{name}.{domain}")
+    if record is None:
+        return False, "No record found"
+    if deleted.get("success"):
+        return True, record["id"]
+    return False, format_errors(deleted)
+
+async def run_bulk(interaction, rows, worker, title):
+    """Run worker over every row with bounded concurrency, editing one progress message.
+
+    Progress and the result CSV go to the channel with the bot token: the
+    interaction webhook expires after 15 minutes, long before a large job ends.
+    """
+    results = [None] * len(rows)
+    counts = {"done": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+    try:
+        if interaction.channel is None:
+            raise discord.ClientException("no channel")
+        progress = await interaction.channel.send(f"⏳ {title} for {interaction.user.mention}: 0/{len(rows)}")
+    except (discord.ClientException, discord.HTTPException) as e:
+        await interaction.followup.send(f"❌ Can't post progress in this channel, nothing was changed: {e}")
+        return
+    await interaction.followup.send(f"⏳ {title} started for {len(rows)} rows, progress: {progress.jump_url}")
+
+    async def run_row(i, row):
+        async with semaphore:
+            try:
+                ok, detail = await worker(*row)
+            except Exception as e:
+                ok, detail = False, f"{type(e).__name__}: {e}"
+        results[i] = (ok, detail)
+        counts["done"] += 1
+        if not ok:
+            counts["failed"] += 1
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(BULK_PROGRESS_INTERVAL)
+            try:
+                await progress.edit(content=f"⏳ {title}: {counts['done']}/{len(rows)} ({counts['failed']} failed)")
+            except discord.HTTPException as e:
+                print(f"⚠️ Bulk progress update failed: {e}")
+
+    reporter = asyncio.create_task(report_progress())
+    try:
+        await asyncio.gather(*(run_row(i, row) for i, row in enumerate(rows)))
+    finally:
+        reporter.cancel()
+
+    summary = io.StringIO()
+    writer = csv.writer(summary)
+    writer.writerow(["name", "ip", "domain", "result", "detail"])
+    for (name, ip, domain), (ok, detail) in zip(rows, results):
+        writer.writerow([name, ip, domain, "ok" if ok else "failed", detail])
+    ok_count = len(rows) - counts["failed"]
+    try:
+        await progress.edit(content=f"✅ {title}: {ok_count} succeeded, {counts['failed']} failed.")
+    except discord.HTTPException as e:
+        print(f"⚠️ Bulk progress update failed: {e}")
+    await progress.channel.send(
+        f"📄 {title} results for {interaction.user.mention}",
+        file=discord.File(io.BytesIO(summary.getvalue().encode()), filename="bulk_result.csv"),
+    )
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as resp:
-            return await resp.json()
+async def start_bulk(interaction, file, domain, worker, title):
+    await interaction.response.defer(thinking=True)
+    try:
+        rows = parse_bulk_csv(await file.read(), domain)
+    except (UnicodeDecodeError, csv.Error) as e:
+        await interaction.followup.send(f"❌ Could not read CSV: {e}")
+        return
+    if not rows:
+        await interaction.followup.send("⚠️ The CSV has no rows.")
+        return
+    if len(rows) > BULK_MAX_ROWS:
+        await interaction.followup.send(f"❌ Too many rows ({len(rows)}), the limit is {BULK_MAX_ROWS}.")
+        return
+    await run_bulk(interaction, rows, worker, title)
+
+
+# ----------- Command Sync -----------
+
+def command_tree_hash():
+    """Stable hash of the slash command payload a sync would send."""
+    payload = sorted((command.to_dict(bot.tree) for command in bot.tree.get_commands()), key=lambda c: c["name"])
+    blob = json.dumps([bot.application_id, payload], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+async def sync_commands():
+    """Sync the command tree once per change instead of on every start or reconnect."""
+    digest = command_tree_hash()
+    try:
+        with open(COMMAND_HASH_FILE) as f:
+            if f.read().strip() == digest:
+                print("💤 Slash commands unchanged, skipping sync.")
+                return
+    except OSError:
+        pass
+    try:
+        synced = await bot.tree.sync()
+    except discord.HTTPException as e:
+        print(f"⚠️ Slash command sync failed: {e}")
+        return
+    with open(COMMAND_HASH_FILE, "w") as f:
+        f.write(digest)
+    print(f"🔄 Synced {len(synced)} slash commands.")
 
 
 # ----------- Events -----------
 
 @bot.event
 async def on_ready():
-    await bot.tree.sync()
+    # Also fires after every gateway reconnect, so only cheap, repeatable work belongs here
     activity = discord.Activity(
         type=discord.ActivityType.watching,
         name="PowerDev | /help"
@@ -77,17 +316,45 @@ async def on_ready():
     print(f"💻 Loaded {len(bot.tree.get_commands())} slash commands.")
 
 
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    timer = interaction.extras.pop("metrics_timer", None)
+    if timer is not None:
+        timer.finish()
+
+
+# ----------- Autocomplete -----------
+
+async def domain_autocomplete(interaction: discord.Interaction, current: str):
+    current = current.strip().lower()
+    return [
+        app_commands.Choice(name=domain, value=domain) for domain in ZONE_IDS if current in domain
+    ][:AUTOCOMPLETE_LIMIT]
+
+async def record_name_autocomplete(interaction: discord.Interaction, current: str):
+    """Existing subdomains of the chosen domain, served from the in-memory record index."""
+    domain = interaction.namespace.domain or (DOMAIN_LIST[0] if len(DOMAIN_LIST) == 1 else None)
+    zone_id = zone_for(domain) if domain else None
+    if zone_id is None:
+        return []
+    suffix = f".{domain.strip().lower()}"
+    names = records.search(zone_id, current.strip(), AUTOCOMPLETE_LIMIT)
+    return [
+        app_commands.Choice(name=name[:-len(suffix)], value=name[:-len(suffix)])
+        for name in names if name.endswith(suffix)
+    ]
+
+
 # ----------- Slash Commands -----------
 
 @bot.tree.command(name="subdomain_create", description="Create a new subdomain in Cloudflare DNS")
 @app_commands.describe(domain="Select domain", name="Subdomain name", ip="IP address")
+@app_commands.autocomplete(domain=domain_autocomplete)
 async def create(interaction: discord.Interaction, domain: str, name: str, ip: str):
     await interaction.response.defer(thinking=True)
 
-    try:
-        zone_index = DOMAINS.index(domain)
-        zone_id = ZONES[zone_index]
-    except ValueError:
+    zone_id = zone_for(domain)
+    if zone_id is None:
         await interaction.followup.send(f"❌ Domain `{domain}` not found in bot config.")
         return
 
@@ -110,23 +377,19 @@ async def create(interaction: discord.Interaction, domain: str, name: str, ip: s
 
 @bot.tree.command(name="subdomain_delete", description="Delete a subdomain from Cloudflare DNS")
 @app_commands.describe(domain="Select domain", name="Subdomain name")
+@app_commands.autocomplete(domain=domain_autocomplete, name=record_name_autocomplete)
 async def delete(interaction: discord.Interaction, domain: str, name: str):
     await interaction.response.defer(thinking=True)
 
-    try:
-        zone_index = DOMAINS.index(domain)
-        zone_id = ZONES[zone_index]
-    except ValueError:
+    zone_id = zone_for(domain)
+    if zone_id is None:
         await interaction.followup.send(f"❌ Domain `{domain}` not found in bot config.")
         return
 
     full_name = f"{name}.{domain}"
-    records = await get_record(zone_id, full_name)
-
-    if records.get("success") and records["result"]:
-        record_id = records["result"][0]["id"]
-        deleted = await delete_record(zone_id, record_id)
+    record, deleted = await delete_record_by_name(zone_id, full_name)
 
+    if record is not None:
         if deleted.get("success"):
             embed = discord.Embed(
                 title="🗑️ Subdomain Deleted",
@@ -142,26 +405,58 @@ async def delete(interaction: discord.Interaction, domain: str, name: str):
         await interaction.followup.send("⚠️ No record found for that subdomain.")
 
 
+@bot.tree.command(name="subdomain_bulk_create", description="Create subdomains from a CSV of name,ip[,domain]")
+@app_commands.describe(file="CSV file with name,ip[,domain] rows", domain="Domain for rows without one")
+@app_commands.autocomplete(domain=domain_autocomplete)
+async def bulk_create(interaction: discord.Interaction, file: discord.Attachment, domain: str = None):
+    await start_bulk(interaction, file, domain, bulk_create_one, "Creating subdomains")
+
+
+@bot.tree.command(name="subdomain_bulk_delete", description="Delete subdomains listed in a CSV of name,ip[,domain]")
+@app_commands.describe(file="CSV file with name,ip[,domain] rows (ip is ignored)", domain="Domain for rows without one")
+@app_commands.autocomplete(domain=domain_autocomplete)
+async def bulk_delete(interaction: discord.Interaction, file: discord.Attachment, domain: str = None):
+    await start_bulk(interaction, file, domain, bulk_delete_one, "Deleting subdomains")
+
+
+def format_series(buffer, unit):
+    current = buffer.latest()
+    if current is None:
+        return "collecting..."
+    low, avg, high = buffer.stats()
+    return f"{current:.0f}{unit}\n`{low:.0f}/{avg:.0f}/{high:.0f}` min/avg/max"
+
+
 @bot.tree.command(name="botinfo", description="Show bot information and stats")
 async def botinfo(interaction: discord.Interaction):
     uptime = get_uptime()
-    ping = round(bot.latency * 1000)
-    cpu = psutil.cpu_percent()
-    memory = psutil.virtual_memory().percent
     total_guilds = len(bot.guilds)
 
     embed = discord.Embed(title="🤖 Bot Information", color=discord.Color.blurple())
     embed.add_field(name="🧑‍💻 Developer", value="**PowerDev**", inline=True)
-    embed.add_field(name="📡 Ping", value=f"{ping} ms", inline=True)
     embed.add_field(name="🌐 Servers", value=f"{total_guilds}", inline=True)
     embed.add_field(name="⚙️ System", value=platform.system(), inline=True)
     embed.add_field(name="🕒 Uptime", value=uptime, inline=True)
-    embed.add_field(name="💽 CPU / RAM", value=f"{cpu}% / {memory}%", inline=True)
-    embed.set_footer(text="Made by PowerDev | Cloudflare DNS Manager")
+    embed.add_field(name="📡 Ping", value=format_series(sampler.gateway, " ms"), inline=True)
+    embed.add_field(name="⏱️ Loop Lag", value=format_series(sampler.loop_lag, " ms"), inline=True)
+    embed.add_field(name="💽 CPU", value=format_series(sampler.cpu, "%"), inline=True)
+    embed.add_field(name="🧠 RAM", value=format_series(sampler.ram, "%"), inline=True)
+    embed.set_footer(text=f"Last hour, sampled every {SAMPLE_INTERVAL}s | Made by PowerDev | Cloudflare DNS Manager")
 
     await interaction.response.send_message(embed=embed)
 
 
+@bot.tree.command(name="stats", description="Show command, Cloudflare and cache latency stats")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def stats(interaction: discord.Interaction):
+    lines = REGISTRY.summary() or ["No requests recorded yet."]
+    embed = discord.Embed(title="📊 Bot Stats", description="\n".join(lines)[:4000], color=discord.Color.blurple())
+    embed.set_footer(text="Made by PowerDev | Cloudflare DNS Manager")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
 # ----------- Run Bot -----------
 
-bot.run(DISCORD_TOKEN)
+if __name__ == "__main__":
+    bot.run(DISCORD_TOKEN)
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import re
+import time
+from typing import Optional
+
+import aiohttp
+
+from metrics import REGISTRY
+
+API_BASE = "https://api.cloudflare.com/client/v4"
+
+# Cloudflare allows 1200 requests per 5 minutes per token
+DEFAULT_RATE = 4.0
+DEFAULT_BURST = 10
+
+# POST creates a new record each time it lands, so it is only retried when it can't have reached Cloudflare
+REPLAY_UNSAFE = {"POST"}
+
+# Zone and record ids, collapsed so per-endpoint metrics don't grow with every record
+_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+
+class TokenBucket:
+    """Shared rate limiter. Callers queue in arrival order until a token is free."""
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. after Cloudflare answered 429."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CloudflareClient:
+    """Long-lived Cloudflare API client with keep-alive, rate limiting and retries."""
+    def __init__(self, api_token: str, *, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 timeout: float = 15, max_retries: int = 3, pool_size: int = 20):
+        self.api_token = api_token
+        self.limiter = TokenBucket(rate, burst)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.api_token}", "Content-Type": "application/json"},
+            )
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    @staticmethod
+    def _retry_after(resp: aiohttp.ClientResponse, fallback: float) -> float:
+        try:
+            return max(float(resp.headers["Retry-After"]), 0.0)
+        except (KeyError, ValueError):
+            return fallback
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # Full jitter: spread retries so concurrent commands don't retry in lockstep
+        return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+    async def request(self, method: str, path: str, **kwargs) -> dict:
+        """Call the API and return Cloudflare's JSON envelope.
+
+        Failures that survive every retry come back as an envelope with
+        ``success`` set to False, so callers handle them like API errors.
+        A POST is retried only after a 429 or a failed connect; after a
+        timeout or 5xx it may already have been applied.
+        """
+        await self.start()
+        endpoint = f"{method} {_ID_RE.sub('{id}', path)}"
+        replayable = method.upper() not in REPLAY_UNSAFE
+        error = "Unknown error"
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            try:
+                with REGISTRY.http("cloudflare", endpoint) as timer:
+                    async with self.session.request(method, f"{API_BASE}{path}", **kwargs) as resp:
+                        if resp.status == 429 or resp.status >= 500:
+                            timer.failed = True
+                        if resp.status == 429:
+                            delay = self._retry_after(resp, self._backoff(attempt + 1))
+                            self.limiter.pause(delay)
+                            error = f"Rate limited by Cloudflare (retry after {delay:.0f}s)"
+                            continue
+                        if resp.status >= 500:
+                            error = f"Cloudflare returned HTTP {resp.status}"
+                        else:
+                            return await resp.json(content_type=None)
+            except aiohttp.ClientConnectorError as e:
+                error = f"{type(e).__name__}: {e}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                if not replayable:
+                    break
+            else:
+                if not replayable:
+                    break  # 5xx: the request reached Cloudflare
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt))
+        return {"success": False, "errors": [{"message": error}], "result": None}
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cloudflare_api import CloudflareClient
+
+logger = logging.getLogger(__name__)
+
+# Fields kept per record; the rest of Cloudflare's payload is dropped to keep the index small
+RECORD_FIELDS = ("id", "name", "type", "content", "proxied", "ttl", "comment", "modified_on")
+PAGE_SIZE = 1000
+# "Record does not exist", e.g. when the cached id is stale
+RECORD_NOT_FOUND = 81044
+# "An identical record already exists", e.g. when an earlier create timed out after it was applied
+IDENTICAL_RECORD = 81058
+
+RecordKey = Tuple[str, str]
+
+
+def has_error(data: dict, code: int) -> bool:
+    return any(isinstance(e, dict) and e.get("code") == code for e in data.get("errors") or [])
+
+
+def slim(record: dict) -> dict:
+    return {field: record.get(field) for field in RECORD_FIELDS}
+
+
+class ZoneRecords:
+    """Records of a single zone, looked up by (fqdn, type), by record id or by name prefix."""
+    __slots__ = ("by_key", "by_id", "loaded_at", "_sorted")
+
+    def __init__(self):
+        self.by_key: Dict[RecordKey, dict] = {}
+        self.by_id: Dict[str, RecordKey] = {}
+        self.loaded_at = 0.0
+        # Keys in name order for prefix search; built on first search, then kept in step
+        self._sorted: Optional[List[RecordKey]] = None
+
+    def add(self, record: dict):
+        key = (record["name"].lower(), record["type"])
+        if self._sorted is not None and key not in self.by_key:
+            insort(self._sorted, key)
+        self.by_key[key] = record
+        self.by_id[record["id"]] = key
+
+    def remove(self, record_id: str) -> Optional[dict]:
+        key = self.by_id.pop(record_id, None)
+        if key is None:
+            return None
+        record = self.by_key.get(key)
+        if record is not None and record["id"] == record_id:
+            if self._sorted is not None:
+                del self._sorted[bisect_left(self._sorted, key)]
+            return self.by_key.pop(key)
+        return None
+
+    def search(self, prefix: str, limit: int = 25) -> List[str]:
+        """Up to limit distinct record names starting with prefix, in name order."""
+        if self._sorted is None:
+            self._sorted = sorted(self.by_key)
+        keys = self._sorted
+        names: List[str] = []
+        i = bisect_left(keys, (prefix, ""))
+        while i < len(keys) and len(names) < limit and keys[i][0].startswith(prefix):
+            if not names or names[-1] != keys[i][0]:
+                names.append(keys[i][0])
+            i += 1
+        return names
+
+
+class RecordIndex:
+    """In-memory index of every configured zone's DNS records.
+
+    The index is filled from a disk snapshot or a full paginated listing,
+    kept current by create/delete calls and re-listed in the background.
+    """
+    def __init__(self, client: CloudflareClient, snapshot_path: str, reconcile_interval: float = 600):
+        self.client = client
+        self.snapshot_path = snapshot_path
+        self.reconcile_interval = reconcile_interval
+        self.zones: Dict[str, ZoneRecords] = {}
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    # ----------- Lookups and updates -----------
+
+    def get(self, zone_id: str, name: str, record_type: str = "A") -> Optional[dict]:
+        zone = self.zones.get(zone_id)
+        if zone is None:
+            return None
+        return zone.by_key.get((name.lower(), record_type))
+
+    def search(self, zone_id: str, prefix: str, limit: int = 25) -> List[str]:
+        zone = self.zones.get(zone_id)
+        if zone is None:
+            return []
+        return zone.search(prefix.lower(), limit)
+
+    def add(self, zone_id: str, record: dict):
+        self.zones.setdefault(zone_id, ZoneRecords()).add(slim(record))
+        self._dirty = True
+
+    def remove(self, zone_id: str, record_id: str):
+        zone = self.zones.get(zone_id)
+        if zone is not None and zone.remove(record_id) is not None:
+            self._dirty = True
+
+    # ----------- Cloudflare writes -----------
+
+    async def create(self, zone_id: str, record: dict) -> dict:
+        """Create a record and index it. Returns Cloudflare's envelope.
+
+        If an identical record already exists, that record is indexed and
+        returned as if it had just been created.
+        """
+        data = await self.client.request("POST", f"/zones/{zone_id}/dns_records", json=record)
+        if not data.get("success") and has_error(data, IDENTICAL_RECORD):
+            existing = await self._find_identical(zone_id, record)
+            if existing is not None:
+                data = {**data, "success": True, "errors": [], "result": existing}
+        if data.get("success"):
+            self.add(zone_id, data["result"])
+        return data
+
+    async def _find_identical(self, zone_id: str, record: dict) -> Optional[dict]:
+        params = {"name": record["name"], "type": record.get("type", "A")}
+        data = await self.client.request("GET", f"/zones/{zone_id}/dns_records", params=params)
+        for found in data.get("result") or []:
+            if found.get("content") == record.get("content"):
+                return found
+        return None
+
+    async def update(self, zone_id: str, record_id: str, changes: dict) -> dict:
+        """Patch fields of a record and re-index it. Returns Cloudflare's envelope."""
+        data = await self.client.request("PATCH", f"/zones/{zone_id}/dns_records/{record_id}", json=changes)
+        if data.get("success"):
+            self.remove(zone_id, record_id)
+            self.add(zone_id, data["result"])
+        return data
+
+    async def delete(self, zone_id: str, record_id: str) -> dict:
+        """Delete a record and drop it from the index. Returns Cloudflare's envelope."""
+        data = await self.client.request("DELETE", f"/zones/{zone_id}/dns_records/{record_id}")
+        if data.get("success"):
+            self.remove(zone_id, record_id)
+        return data
+
+    # ----------- Loading -----------
+
+    async def fetch_zone(self, zone_id: str) -> Optional[ZoneRecords]:
+        """List every record of a zone, page by page. Returns None if Cloudflare fails."""
+        zone = ZoneRecords()
+        page = 1
+        while True:
+            data = await self.client.request(
+                "GET", f"/zones/{zone_id}/dns_records", params={"page": page, "per_page": PAGE_SIZE}
+            )
+            if not data.get("success"):
+                logger.warning(f"Listing DNS records of zone {zone_id} failed: {data.get('errors')}")
+                return None
+            for record in data.get("result") or []:
+                zone.add(slim(record))
+            total_pages = (data.get("result_info") or {}).get("total_pages", 1)
+            if page >= total_pages:
+                break
+            page += 1
+        zone.loaded_at = time.time()
+        return zone
+
+    async def refresh_zone(self, zone_id: str):
+        zone = await self.fetch_zone(zone_id)
+        if zone is not None:
+            self.zones[zone_id] = zone
+            self._dirty = True
+            logger.info(f"Indexed {len(zone.by_key)} DNS records for zone {zone_id}")
+
+    async def start(self, zone_ids: Iterable[str]):
+        """Load the snapshot, then list missing zones and reconcile in the background."""
+        zone_ids = list(zone_ids)
+        self.load_snapshot(zone_ids)
+        missing = [zone_id for zone_id in zone_ids if zone_id not in self.zones]
+        self._task = asyncio.create_task(self._run(zone_ids, missing))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.save_snapshot()
+
+    async def _run(self, zone_ids, missing):
+        for zone_id in missing:
+            await self.refresh_zone(zone_id)
+        await self.save_snapshot()
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            for zone_id in zone_ids:
+                try:
+                    await self.refresh_zone(zone_id)
+                except Exception as e:
+                    logger.error(f"DNS index reconcile for zone {zone_id} failed: {e}")
+            await self.save_snapshot()
+
+    # ----------- Snapshot -----------
+
+    def load_snapshot(self, zone_ids: Iterable[str]):
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable DNS snapshot {self.snapshot_path}: {e}")
+            return
+        for zone_id in zone_ids:
+            data = snapshot.get(zone_id)
+            if not data:
+                continue
+            zone = ZoneRecords()
+            for record in data["records"]:
+                zone.add(record)
+            zone.loaded_at = data.get("loaded_at", 0.0)
+            self.zones[zone_id] = zone
+
+    async def save_snapshot(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        snapshot = {
+            zone_id: {"loaded_at": zone.loaded_at, "records": list(zone.by_key.values())}
+            for zone_id, zone in self.zones.items()
+        }
+        await asyncio.to_thread(self._write_snapshot, json.dumps(snapshot))
+
+    def _write_snapshot(self, payload: str):
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, self.snapshot_path)
@@ -0,0 +1,285 @@
+import asyncio
+import ipaddress
+import logging
+import re
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from dns_index import RecordIndex, ZoneRecords
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Comment stamped on every record the sync creates; records without it are never changed or deleted
+MANAGED_PREFIX = 'gvm-vps:'
+RECORD_TTL = 300
+ADDRESS_TYPES = ('A', 'AAAA')
+# Deletes below this count never trip the delete guard, so small fleets can shrink normally
+DELETE_GUARD_MIN = 3
+
+# (vps_id, name, ssh_host) for every VPS that exists; ssh_host is None when it isn't known yet
+VPSEntry = Tuple[str, str, Optional[str]]
+# None means the VPS list couldn't be read, which must never be mistaken for "no VPS"
+Source = Callable[[], Awaitable[Optional[List[VPSEntry]]]]
+
+_LABEL_RE = re.compile(r'[^a-z0-9-]+')
+
+
+def dns_label(text: str) -> str:
+    return _LABEL_RE.sub('-', text.lower()).strip('-')[:63]
+
+
+def is_managed(record: Optional[dict]) -> bool:
+    return record is not None and (record.get('comment') or '').startswith(MANAGED_PREFIX)
+
+
+class Target(NamedTuple):
+    vps_id: str
+    type: str
+    content: str
+
+
+class Change(NamedTuple):
+    op: str  # 'create', 'update' or 'delete'
+    name: str
+    target: Optional[Target]
+    record: Optional[dict]
+
+    def describe(self) -> str:
+        if self.op == 'delete':
+            return f"➖ {self.name} ({self.record['content']})"
+        if self.op == 'update':
+            return f"✏️ {self.name}: {self.record['content']} → {self.target.content}"
+        return f"➕ {self.name} → {self.target.content} (VPS {self.target.vps_id})"
+
+
+class SyncReport(NamedTuple):
+    changes: List[Change]
+    applied: int
+    failed: int
+    deferred: int  # Over the per-cycle cap, left for the next cycle
+    dry_run: bool
+
+
+class DNSSync:
+    """Keeps one A/AAAA record per VPS in a zone, pointing at the VPS's SSH host.
+
+    Desired state comes from the VPS list, actual state from the RecordIndex,
+    so planning makes no Cloudflare calls. After a full comparison whenever
+    the index re-lists the zone, a cycle only looks at names whose target
+    changed, whose record's modified_on moved, or that are still pending.
+    """
+    def __init__(self, index: RecordIndex, zone_id: str, domain: str, source: Source, *, label: str = '{vps_id}',
+                 interval: float = 300, dry_run: bool = True, max_changes: int = 20, batch_size: int = 5,
+                 max_vps_drop: float = 0.5, max_delete_share: float = 0.25):
+        self.index = index
+        self.zone_id = zone_id
+        self.domain = domain.lower()
+        self.source = source
+        self.label = label
+        self.interval = interval
+        self.dry_run = dry_run
+        self.max_changes = max_changes
+        self.batch_size = batch_size
+        self.max_vps_drop = max_vps_drop  # Share of VPS that may vanish between cycles before the list is distrusted
+        self.max_delete_share = max_delete_share  # Share of managed records one cycle may plan to delete
+        self.last_report: Optional[SyncReport] = None
+        self.blocked: Optional[str] = None  # Why the last cycle was refused, if it was
+        self._vps_count: Optional[int] = None  # VPS count of the last accepted cycle
+        self._targets: Dict[str, Target] = {}  # Desired state as of the previous cycle
+        self._seen: Dict[str, Optional[str]] = {}  # Name -> modified_on of its managed record when last in sync
+        self._pending: Set[str] = set()  # Names with changes not applied yet (dry run, cap or failure)
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ----------- Planning -----------
+
+    def desired(self, entries: List[VPSEntry]) -> Tuple[Dict[str, Target], Set[str]]:
+        """Target record per name, plus the names of VPS whose address isn't known (left untouched)."""
+        targets: Dict[str, Target] = {}
+        unknown: Set[str] = set()
+        for vps_id, name, host in entries:
+            fqdn = f"{dns_label(self.label.format(vps_id=vps_id, name=name))}.{self.domain}"
+            try:
+                address = ipaddress.ip_address(host or '')
+            except ValueError:
+                unknown.add(fqdn)  # Not stored yet, or a hostname: keep whatever record exists
+                continue
+            if fqdn in targets:
+                logger.warning(f"DNS sync: VPS {vps_id} and {targets[fqdn].vps_id} both map to {fqdn}, skipping")
+                continue
+            targets[fqdn] = Target(vps_id, 'A' if address.version == 4 else 'AAAA', str(address))
+        return targets, unknown
+
+    @staticmethod
+    def _record(zone: ZoneRecords, name: str) -> Optional[dict]:
+        for record_type in ADDRESS_TYPES:
+            record = zone.by_key.get((name, record_type))
+            if record is not None:
+                return record
+        return None
+
+    def _candidates(self, zone: ZoneRecords, targets: Dict[str, Target]) -> Set[str]:
+        if zone.loaded_at != self._loaded_at:
+            # The index re-listed the zone: compare everything once, including managed records we never made
+            self._loaded_at = zone.loaded_at
+            managed = {name for (name, _), record in zone.by_key.items() if is_managed(record)}
+            return set(targets) | managed | set(self._seen) | self._pending
+        candidates = {name for name, target in targets.items() if self._targets.get(name) != target}
+        candidates.update(name for name in self._targets if name not in targets)
+        for name, modified_on in self._seen.items():
+            record = self._record(zone, name)
+            if (record and record.get('modified_on')) != modified_on:
+                candidates.add(name)
+        return candidates | self._pending
+
+    def _block(self, reason: str) -> None:
+        self.blocked = reason
+        logger.warning(f"DNS sync refused: {reason}")
+
+    def _distrust(self, count: int) -> Optional[str]:
+        """Reason not to trust a VPS list of this size, if any."""
+        if count == 0:
+            return "the panel returned an empty VPS list"
+        if self._vps_count and count < self._vps_count * (1 - self.max_vps_drop):
+            return f"the VPS count dropped from {self._vps_count} to {count}"
+        return None
+
+    async def plan(self, force: bool = False) -> Optional[List[Change]]:
+        """Changes needed to bring the zone in line with the VPS list.
+
+        None if either side is unavailable, or if the VPS list or the planned
+        deletes look like a panel failure rather than real removals (see
+        ``blocked``); ``force`` skips those two checks.
+        """
+        self.blocked = None
+        entries = await self.source()
+        zone = self.index.zones.get(self.zone_id)
+        if entries is None or zone is None:
+            return None
+        reason = None if force else self._distrust(len(entries))
+        if reason:
+            self._block(reason)
+            return None
+        targets, unknown = self.desired(entries)
+        candidates = self._candidates(zone, targets)
+        self._targets = targets
+
+        changes = []
+        for name in sorted(candidates - unknown):
+            record = self._record(zone, name)
+            target = targets.get(name)
+            if target is None:
+                if is_managed(record):
+                    changes.append(Change('delete', name, None, record))
+                else:
+                    self._forget(name)
+            elif record is None:
+                changes.append(Change('create', name, target, None))
+            elif not is_managed(record):
+                logger.warning(f"DNS sync: {name} already exists and isn't managed by the sync, leaving it alone")
+                self._forget(name)
+            elif (record['type'], record['content']) != (target.type, target.content):
+                changes.append(Change('update', name, target, record))
+            else:
+                self._in_sync(name, record)
+
+        deletes = sum(change.op == 'delete' for change in changes)
+        if not force and deletes > DELETE_GUARD_MIN:
+            managed = sum(is_managed(record) for record in zone.by_key.values())
+            if deletes > managed * self.max_delete_share:
+                # Keep them pending so a forced or later cycle still sees them
+                self._pending.update(change.name for change in changes)
+                self._block(f"{deletes} of {managed} managed records would be deleted")
+                return None
+        self._vps_count = len(entries)
+        return changes
+
+    def _in_sync(self, name: str, record: dict):
+        self._seen[name] = record.get('modified_on')
+        self._pending.discard(name)
+
+    def _forget(self, name: str):
+        self._seen.pop(name, None)
+        self._pending.discard(name)
+
+    # ----------- Applying -----------
+
+    async def _apply(self, change: Change) -> bool:
+        if change.op == 'delete':
+            data = await self.index.delete(self.zone_id, change.record['id'])
+        else:
+            fields = {'type': change.target.type, 'content': change.target.content,
+                      'comment': f'{MANAGED_PREFIX}{change.target.vps_id}'}
+            if change.op == 'update':
+                data = await self.index.update(self.zone_id, change.record['id'], fields)
+            else:
+                data = await self.index.create(self.zone_id, {'name': change.name, 'ttl': RECORD_TTL,
+                                                              'proxied': False, **fields})
+        ok = bool(data.get('success'))
+        REGISTRY.add('dns_sync_changes_total', 1, op=change.op, result='ok' if ok else 'failed')
+        if not ok:
+            logger.warning(f"DNS sync: {change.op} {change.name} failed: {data.get('errors')}")
+            return False
+        if change.op == 'delete':
+            self._forget(change.name)
+        else:
+            self._in_sync(change.name, data['result'])
+        return True
+
+    async def run_once(self, dry_run: Optional[bool] = None, force: bool = False) -> Optional[SyncReport]:
+        """Plan one cycle and apply up to max_changes of it in batches. None if refused or unavailable."""
+        dry_run = self.dry_run if dry_run is None else dry_run
+        async with self._lock:
+            changes = await self.plan(force)
+            if changes is None:
+                return None
+            # Everything planned stays pending until it is applied successfully
+            self._pending.update(change.name for change in changes)
+            batch, deferred = changes[:self.max_changes], len(changes) - self.max_changes
+            applied = failed = 0
+            if not dry_run:
+                for start in range(0, len(batch), self.batch_size):
+                    results = await asyncio.gather(*(self._apply(change) for change in batch[start:start + self.batch_size]))
+                    applied += sum(results)
+                    failed += len(results) - sum(results)
+            report = SyncReport(batch, applied, failed, max(0, deferred), dry_run)
+        if changes:
+            logger.info(f"DNS sync{' (dry run)' if dry_run else ''}: {len(changes)} planned, {applied} applied, "
+                        f"{failed} failed, {report.deferred} deferred")
+            for change in batch:
+                logger.info(f"DNS sync plan: {change.describe()}")
+        self.last_report = report
+        return report
+
+    # ----------- Background loop -----------
+
+    def kick(self):
+        """Run the next cycle now, e.g. after a VPS was created or deleted."""
+        self._wake.set()
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.started:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"DNS sync cycle failed: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
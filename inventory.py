@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from metrics import REGISTRY
+from panel_parser import VPSRow
+
+logger = logging.getLogger(__name__)
+
+# A fetch returns the parsed rows, or an error message for the user
+Fetcher = Callable[[], Awaitable[Union[List[VPSRow], str]]]
+
+
+class VPSInventory:
+    """Cached, parsed VPS list served stale-while-revalidate.
+
+    Reads younger than ``ttl`` are served as is. Older reads are still served
+    from cache while one background refresh runs. Only a cache that is empty
+    or older than ``max_stale`` makes the caller wait for the panel.
+    """
+    def __init__(self, fetch: Fetcher, ttl: float = 60, max_stale: float = 900, refresh_interval: float = 120):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.refresh_interval = refresh_interval
+        self.rows: Optional[Dict[str, VPSRow]] = None
+        self.fetched_at = 0.0
+        self.last_error: Optional[str] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    async def get(self) -> Optional[List[VPSRow]]:
+        """Return the VPS rows, or None if the panel couldn't be read (see last_error)."""
+        if self.rows is None or self.age > self.max_stale:
+            REGISTRY.cache('vps_inventory', False)
+            await self.refresh()
+        else:
+            REGISTRY.cache('vps_inventory', True)
+            if self.age > self.ttl:
+                self._start_refresh()
+        return None if self.rows is None else list(self.rows.values())
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    async def refresh(self):
+        """Refresh now; concurrent callers share one panel request."""
+        await asyncio.shield(self._start_refresh())
+
+    async def _refresh(self):
+        try:
+            result = await self.fetch()
+        except Exception as e:
+            logger.error(f"VPS inventory refresh failed: {e}")
+            self.last_error = "❌ Failed to fetch VPS list."
+            return
+        if isinstance(result, str):
+            self.last_error = result
+            return
+        self.rows = {row.vps_id: row for row in result}
+        self.fetched_at = time.monotonic()
+        self.last_error = None
+
+    # ----------- Updates after panel actions -----------
+
+    def set_status(self, vps_id: str, status: str):
+        if self.rows is not None and vps_id in self.rows:
+            self.rows[vps_id] = self.rows[vps_id]._replace(status=status)
+        self.invalidate()
+
+    def remove(self, vps_id: str):
+        if self.rows is not None:
+            self.rows.pop(vps_id, None)
+
+    def invalidate(self):
+        """Mark the cache stale so the next read revalidates it in the background."""
+        self.fetched_at = min(self.fetched_at, time.monotonic() - self.ttl - 1)
+
+    # ----------- Background refresh -----------
+
+    def start(self):
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+
+    def stop(self):
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        self._loop_task = self._refresh_task = None
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+@dataclass
+class Job:
+    """A queued panel operation and where to report its progress.
+
+    Only the request parameters and outcome are stored; secrets such as the
+    created VPS password are never written to the job file.
+    """
+    job_id: int
+    kind: str
+    params: dict
+    author_id: int
+    channel_id: int
+    message_id: int
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    vps_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+Handler = Callable[[Job], Awaitable[None]]
+
+
+class JobQueue:
+    """Persistent job queue worked by a fixed number of asyncio workers.
+
+    The handler runs a job and fills in its outcome (``vps_id``/``error``);
+    a job that raises is marked failed. Jobs are saved to ``path`` on every
+    state change, so queued work is picked up again after a restart.
+    """
+    def __init__(self, path: str, handler: Handler, workers: int = 2, keep_finished: int = 50):
+        self.path = path
+        self.handler = handler
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self.jobs: Dict[int, Job] = {}
+        self._next_id = 1
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._save_lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def by_status(self, status: str) -> List[Job]:
+        return [job for job in self.jobs.values() if job.status == status]
+
+    def position(self, job: Job) -> int:
+        """1-based place of a queued job in line."""
+        return sum(1 for other in self.by_status(QUEUED) if other.job_id <= job.job_id)
+
+    async def submit(self, kind: str, params: dict, author_id: int, channel_id: int, message_id: int) -> Job:
+        """Save and queue a job. Only valid once start() has loaded the saved jobs."""
+        if not self.started:
+            # Saving now would let start() load the job from disk and run it behind the caller's back
+            raise RuntimeError("JobQueue.submit() called before start()")
+        job = Job(self._next_id, kind, params, author_id, channel_id, message_id)
+        self._next_id += 1
+        self.jobs[job.job_id] = job
+        await self.save()
+        self._queue.put_nowait(job)
+        return job
+
+    async def start(self, recover: Callable[[Job], Awaitable[bool]]):
+        """Load saved jobs and start the workers.
+
+        ``recover`` decides for each job that was running when the bot stopped:
+        return True to run it again, or settle the job and return False.
+        """
+        self._queue = asyncio.Queue()
+        self.load()
+        for job in sorted(self.jobs.values(), key=lambda j: j.job_id):
+            if job.status == RUNNING:
+                if await recover(job):
+                    job.status = QUEUED
+                else:
+                    continue
+            if job.status == QUEUED:
+                self._queue.put_nowait(job)
+        await self.save()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            await self.save()
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                raise  # Leave it RUNNING so recover() sees it after a restart
+            except Exception as e:
+                logger.exception(f"Job #{job.job_id} crashed")
+                job.error = f"❌ Job crashed: {e}"
+            job.status = FAILED if job.error else DONE
+            job.finished_at = time.time()
+            self._prune()
+            await self.save()
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.status in (DONE, FAILED)]
+        for job in finished[:-self.keep_finished]:
+            del self.jobs[job.job_id]
+
+    # ----------- Persistence -----------
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable job file {self.path}: {e}")
+            return
+        self._next_id = data.get('next_id', 1)
+        self.jobs = {job['job_id']: Job(**job) for job in data.get('jobs', [])}
+
+    async def save(self):
+        payload = json.dumps({'next_id': self._next_id, 'jobs': [asdict(job) for job in self.jobs.values()]})
+        async with self._save_lock:
+            await asyncio.to_thread(self._write, payload)
+
+    def _write(self, payload: str):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
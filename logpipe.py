@@ -0,0 +1,121 @@
+import logging
+import logging.handlers
+import queue
+import random
+import re
+from typing import Any, Optional
+
+REDACTED = '***'
+
+# Dict keys whose values never reach a log line
+_SENSITIVE_KEY_RE = re.compile(r'pass(word|wd)?|token|secret|api[_-]?key|authorization|cookie', re.IGNORECASE)
+# Same secrets embedded in text: "password=...", "'_token': '...'", "Authorization: Bearer ...", or the
+# panel's "Password:\n<value>", whose value runs to the end of the line and may hold spaces or commas
+_SENSITIVE_TEXT_RE = re.compile(
+    r'''(?:pass(?:word|wd)?|token|secret|api[_-]?key|authorization)['"]?\s*[:=]'''
+    r'''(?:[ \t]*\r?\n\s*(?P<line>[^\r\n]+)'''
+    r'''|[ \t]*(?P<quote>['"])(?P<quoted>(?:\\.|(?!(?P=quote))[^\\\r\n])+)(?P=quote)'''
+    r'''|[ \t]*['"]?(?:(?:bearer|basic)[ \t]+)?(?P<bare>[^\s'",}]+))'''
+    r'''|\bbearer[ \t]+(?P<bearer>[\w.~+/=-]+)''',
+    re.IGNORECASE,
+)
+_SECRET_GROUPS = ('line', 'quoted', 'bare', 'bearer')
+
+_body_sample_rate = 0.0
+
+
+def _mask(match: re.Match) -> str:
+    group = next(name for name in _SECRET_GROUPS if match.group(name) is not None)
+    text, start = match.group(0), match.start()
+    return text[:match.start(group) - start] + REDACTED + text[match.end(group) - start:]
+
+
+def redact_text(text: str) -> str:
+    return _SENSITIVE_TEXT_RE.sub(_mask, text)
+
+
+def redact(value: Any) -> Any:
+    """Copy of value with sensitive dict entries and inline secrets masked."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if isinstance(key, str) and _SENSITIVE_KEY_RE.search(key) and val else redact(val)
+            for key, val in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+def fields(**values: Any) -> dict:
+    """Structured fields for a log call: logger.info("msg", extra=fields(status=200))."""
+    return {'fields': values}
+
+
+class RedactingFilter(logging.Filter):
+    """Masks secrets on the record itself, before any handler formats it."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            record.msg = redact_text(record.msg)
+        if record.args:
+            record.args = redact(record.args)
+        record_fields = getattr(record, 'fields', None)
+        if record_fields:
+            record.fields = redact(record_fields)
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """Appends the record's structured fields as key=value pairs."""
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        record_fields = getattr(record, 'fields', None)
+        if record_fields:
+            line += ' | ' + ' '.join(f'{key}={value!r}' for key, value in record_fields.items())
+        return line
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # Hand the record over as is: formatting happens on the listener thread, not the event loop
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: int = logging.INFO, log_file: Optional[str] = None,
+                  body_sample_rate: float = 0.0) -> logging.handlers.QueueListener:
+    """Route all logging through a queue; a listener thread does the formatting and I/O.
+
+    Call .stop() on the returned listener at shutdown to flush pending records.
+    """
+    global _body_sample_rate
+    _body_sample_rate = body_sample_rate
+
+    formatter = StructuredFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=10 * 2 ** 20, backupCount=3))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RedactingFilter())
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def log_body(logger: logging.Logger, label: str, status: int, text: str, limit: int = 500):
+    """Log a response body at DEBUG, or at INFO for a sampled fraction of responses."""
+    if logger.isEnabledFor(logging.DEBUG):
+        level = logging.DEBUG
+    elif _body_sample_rate and random.random() < _body_sample_rate:
+        level = logging.INFO
+    else:
+        return
+    logger.log(level, f'{label} body', extra=fields(status=status, body=text[:limit]))
@@ -0,0 +1,226 @@
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+# Latency buckets in seconds, spanning fast cache hits to slow panel calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_HELP = {
+    'command_duration_seconds': 'Time to handle a bot command.',
+    'command_errors_total': 'Bot commands that raised or failed.',
+    'commands_in_flight': 'Bot commands currently running.',
+    'http_request_duration_seconds': 'Outbound HTTP request latency by service and endpoint.',
+    'http_errors_total': 'Outbound HTTP requests that failed (network error or 5xx/429).',
+    'http_requests_in_flight': 'Outbound HTTP requests currently waiting for a response.',
+    'cache_requests_total': 'Cache lookups by cache and result (hit or miss).',
+    'discord_gateway_latency_seconds': 'Discord gateway heartbeat latency.',
+    'dns_sync_changes_total': 'DNS records changed by the VPS DNS sync, by operation and result.',
+}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound containing the q-th observation (an estimate, like Prometheus)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+# Metric names per timed kind: (duration histogram, in-flight gauge, error counter)
+KINDS = {
+    'command': ('command_duration_seconds', 'commands_in_flight', 'command_errors_total'),
+    'http': ('http_request_duration_seconds', 'http_requests_in_flight', 'http_errors_total'),
+}
+
+
+class Timer:
+    """Times one command or request; use as a context manager or call finish()."""
+    __slots__ = ('registry', 'names', 'labels', 'started', 'failed')
+
+    def __init__(self, registry: 'Registry', kind: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.names = KINDS[kind]
+        self.labels = labels
+        self.failed = False
+        self.started = time.perf_counter()
+        registry.add(self.names[1], 1, **labels)
+
+    def __enter__(self) -> 'Timer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(failed=exc_type is not None)
+
+    def finish(self, failed: bool = False):
+        duration, in_flight, errors = self.names
+        self.registry.add(in_flight, -1, **self.labels)
+        self.registry.observe(duration, time.perf_counter() - self.started, **self.labels)
+        if failed or self.failed:
+            self.registry.add(errors, 1, **self.labels)
+
+
+class Registry:
+    """Minimal in-process metrics store rendered in the Prometheus text format."""
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.values: Dict[Tuple[str, Labels], float] = {}
+        self.callbacks: Dict[str, Callable[[], float]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Labels]:
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def add(self, name: str, value: float = 1, **labels: str):
+        key = self._key(name, labels)
+        self.values[key] = self.values.get(key, 0) + value
+
+    def gauge(self, name: str, callback: Callable[[], float]):
+        """Register a gauge whose value is read at scrape time."""
+        self.callbacks[name] = callback
+
+    # ----------- Helpers used by the bots -----------
+
+    def command(self, name: str) -> Timer:
+        return Timer(self, 'command', {'command': name})
+
+    def http(self, service: str, endpoint: str) -> Timer:
+        return Timer(self, 'http', {'service': service, 'endpoint': endpoint})
+
+    def cache(self, cache: str, hit: bool):
+        self.add('cache_requests_total', 1, cache=cache, result='hit' if hit else 'miss')
+
+    def cache_ratio(self, cache: str) -> Optional[float]:
+        hits = self.values.get(self._key('cache_requests_total', {'cache': cache, 'result': 'hit'}), 0)
+        misses = self.values.get(self._key('cache_requests_total', {'cache': cache, 'result': 'miss'}), 0)
+        return hits / (hits + misses) if hits + misses else None
+
+    def caches(self) -> List[str]:
+        return sorted({dict(labels)['cache'] for name, labels in self.values if name == 'cache_requests_total'})
+
+    def histograms_named(self, name: str) -> Iterable[Tuple[Dict[str, str], Histogram]]:
+        for (metric, labels), histogram in sorted(self.histograms.items()):
+            if metric == name:
+                yield dict(labels), histogram
+
+    def value(self, name: str, **labels: str) -> float:
+        return self.values.get(self._key(name, labels), 0)
+
+    # ----------- Exposition -----------
+
+    def _name(self, name: str) -> str:
+        return f'{self.namespace}_{name}'
+
+    @staticmethod
+    def _labels(labels: Labels, extra: str = '') -> str:
+        parts = [f'{key}="{value}"' for key, value in labels]
+        if extra:
+            parts.append(extra)
+        return '{' + ','.join(parts) + '}' if parts else ''
+
+    def render(self) -> str:
+        lines = []
+        declared = set()
+
+        def declare(name: str, kind: str):
+            if name not in declared:
+                declared.add(name)
+                base = name[len(self.namespace) + 1:]
+                if base in _HELP:
+                    lines.append(f'# HELP {name} {_HELP[base]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            full = self._name(name)
+            declare(full, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{full}_bucket{self._labels(labels, le)} {cumulative}')
+            le = 'le="+Inf"'
+            lines.append(f'{full}_bucket{self._labels(labels, le)} {histogram.count}')
+            lines.append(f'{full}_sum{self._labels(labels)} {histogram.sum}')
+            lines.append(f'{full}_count{self._labels(labels)} {histogram.count}')
+        for (name, labels), value in sorted(self.values.items()):
+            full = self._name(name)
+            declare(full, 'counter' if name.endswith('_total') else 'gauge')
+            lines.append(f'{full}{self._labels(labels)} {value}')
+        for name, callback in sorted(self.callbacks.items()):
+            full = self._name(name)
+            declare(full, 'gauge')
+            lines.append(f'{full} {callback()}')
+        return '\n'.join(lines) + '\n'
+
+    async def serve(self, host: str, port: int) -> 'web.AppRunner':
+        """Expose /metrics over HTTP. Keep host on localhost unless a scraper needs it."""
+        from aiohttp import web  # Server side of aiohttp is only loaded when metrics are served
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text=self.render(), content_type='text/plain', charset='utf-8')
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    def summary(self) -> List[str]:
+        """Short human-readable lines for the stats commands."""
+        lines = []
+        for kind, title in (('command', 'Commands'), ('http', 'Outbound HTTP')):
+            duration, in_flight_name, errors_name = KINDS[kind]
+            entries = list(self.histograms_named(duration))
+            if not entries:
+                continue
+            lines.append(f'**{title}**')
+            for labels, histogram in entries:
+                label = ' '.join(labels[key] for key in ('service', 'endpoint', 'command') if key in labels)
+                errors = int(self.value(errors_name, **labels))
+                in_flight = int(self.value(in_flight_name, **labels))
+                lines.append(
+                    f'`{label}` n={histogram.count} avg={histogram.sum / histogram.count * 1000:.0f}ms '
+                    f'p50≤{histogram.quantile(0.5) * 1000:.0f}ms p99≤{histogram.quantile(0.99) * 1000:.0f}ms '
+                    f'errors={errors} in-flight={in_flight}'
+                )
+        caches = self.caches()
+        if caches:
+            lines.append('**Caches**')
+            for cache in caches:
+                lines.append(f'`{cache}` hit ratio {self.cache_ratio(cache):.0%}')
+        return lines
+
+
+REGISTRY = Registry('bot')
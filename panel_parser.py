@@ -0,0 +1,173 @@
+import re
+import sys
+from dataclasses import dataclass, fields
+from html.parser import HTMLParser
+from typing import Iterator, List, NamedTuple, Optional, Pattern
+
+# Panel pages print each detail as "Label:" with the value on the next line.
+# Every field is one named alternative so one finditer() pass finds all of them.
+_CREATE_RE = re.compile(
+    r'VPS ID:\s*[\r\n]+(?P<vps_id>[A-Z0-9]+)'
+    r'|SSH Host:\s*[\r\n]+(?P<ssh_host>[\d.]+)'
+    r'|SSH Port:\s*[\r\n]+(?P<ssh_port>\d+)'
+    r'|Username:\s*[\r\n]+(?P<username>\w+)'
+    r'|Password:\s*[\r\n]+(?P<password>[^\n]+)'
+    r'|Status:\s*[\r\n]+(?P<status>\w+)'
+    r'|Memory\s*[\r\n]+(?P<memory>\d+\s*GB)'
+    r'|CPU\s*[\r\n]+(?P<cpu>\d+\s*Cores)'
+    r'|Disk\s*[\r\n]+(?P<disk>\d+\s*GB)'
+    r'|OS\s*[\r\n]+(?P<os>[^\n]+)'
+)
+
+_SSH_RE = re.compile(
+    r'SSH Host:\s*(?P<host>[\d.]+)'
+    r'|SSH Port:\s*(?P<port>\d+)'
+)
+
+
+@dataclass
+class CreatedVPS:
+    """Fields found on the create_vps success page; None when the page doesn't show one."""
+    vps_id: Optional[str] = None
+    ssh_host: Optional[str] = None
+    ssh_port: Optional[str] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+    status: Optional[str] = None
+    memory: Optional[str] = None
+    cpu: Optional[str] = None
+    disk: Optional[str] = None
+    os: Optional[str] = None
+
+
+@dataclass
+class SSHInfo:
+    host: Optional[str] = None
+    port: Optional[str] = None
+
+
+def _scan(pattern: Pattern, text: str, wanted: int, found: dict, pos: int = 0, endpos: int = sys.maxsize) -> dict:
+    """Collect the first value of each named group, stopping once all are found."""
+    for match in pattern.finditer(text, pos, endpos):
+        name = match.lastgroup
+        if name not in found:
+            found[name] = match.group(name).strip()
+            if len(found) == wanted:
+                break
+    return found
+
+
+_CREATE_FIELDS = len(fields(CreatedVPS))
+_SSH_FIELDS = len(fields(SSHInfo))
+
+
+def is_success_page(text: str) -> bool:
+    # A lowered copy plus substring checks is far cheaper than an IGNORECASE regex
+    lowered = text.lower()
+    return 'success' in lowered or 'created' in lowered
+
+
+def parse_create_page(text: str) -> CreatedVPS:
+    """Fields of the success page after /create_vps.
+
+    Values inside the details block (from 'VPS ID:' on) win over the same
+    label earlier on the page, e.g. a "Node Status: Online" banner no longer
+    hides the VPS status. The old per-field re.search took the first match.
+    """
+    # The alternation is slow to slide over a whole page, so start at the details
+    # block (a fast literal find) and only scan what precedes it for missing fields.
+    start = max(text.find('VPS ID:'), 0)
+    found = _scan(_CREATE_RE, text, _CREATE_FIELDS, {}, start)
+    if start and len(found) < _CREATE_FIELDS:
+        _scan(_CREATE_RE, text, _CREATE_FIELDS, found, 0, start)
+    return CreatedVPS(**found)
+
+
+def parse_ssh_page(text: str) -> SSHInfo:
+    return SSHInfo(**_scan(_SSH_RE, text, _SSH_FIELDS, {}))
+
+
+class VPSRow(NamedTuple):
+    """One row of the /vps/list table."""
+    vps_id: str
+    name: str
+    status: str
+    memory: str
+    cpu: str
+    disk: str
+
+
+# Feed size for the streaming list parser; rows are handed out after each chunk
+_LIST_CHUNK = 64 * 1024
+
+
+class _VPSTableParser(HTMLParser):
+    """Event parser that keeps only <tr>/<td> text, never building a document tree."""
+    def __init__(self):
+        super().__init__()
+        self.rows: List[VPSRow] = []
+        self._seen_header = False
+        self._cells: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._cells.append(''.join(self._cell).strip())
+            self._cell = None
+
+    def _close_row(self):
+        if self._cells is None:
+            return
+        self._close_cell()
+        if not self._seen_header:
+            self._seen_header = True  # First <tr> is the table header
+        elif len(self._cells) >= 6:
+            self.rows.append(VPSRow(*self._cells[:6]))
+        self._cells = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self._close_row()
+            self._cells = []
+        elif tag == 'td' and self._cells is not None:
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == 'td':
+            self._close_cell()
+        elif tag in ('tr', 'table'):
+            self._close_row()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def close(self):
+        super().close()
+        self._close_row()
+
+
+def iter_vps_rows(text: str) -> Iterator[VPSRow]:
+    """Yield VPS table rows while parsing, so callers can stop early."""
+    parser = _VPSTableParser()
+    for offset in range(0, len(text), _LIST_CHUNK):
+        parser.feed(text[offset:offset + _LIST_CHUNK])
+        if parser.rows:
+            yield from parser.rows
+            parser.rows.clear()
+    parser.close()
+    yield from parser.rows
+
+
+def parse_vps_rows_soup(text: str) -> List[VPSRow]:
+    """BeautifulSoup parse limited to <tr> elements; the reference for iter_vps_rows."""
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(text, 'html.parser', parse_only=SoupStrainer('tr'))
+    rows = []
+    for row in soup.find_all('tr')[1:]:  # Skip header
+        cells = row.find_all('td')
+        if len(cells) >= 6:
+            rows.append(VPSRow(*(cell.text.strip() for cell in cells[:6])))
+    return rows
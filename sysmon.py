@@ -0,0 +1,77 @@
+import asyncio
+import math
+import time
+from array import array
+from typing import Callable, Optional, Tuple
+
+
+class RingBuffer:
+    """Fixed-size ring of floats stored in an array('d'), oldest values overwritten."""
+    __slots__ = ('values', 'size', 'count', 'pos')
+
+    def __init__(self, size: int):
+        self.values = array('d', bytes(8 * size))
+        self.size = size
+        self.count = 0
+        self.pos = 0
+
+    def append(self, value: float):
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def latest(self) -> Optional[float]:
+        return self.values[self.pos - 1] if self.count else None
+
+    def stats(self) -> Optional[Tuple[float, float, float]]:
+        """(min, avg, max) of the buffered values."""
+        if not self.count:
+            return None
+        window = self.values if self.count == self.size else self.values[:self.count]
+        return min(window), sum(window) / self.count, max(window)
+
+
+class SystemSampler:
+    """Samples CPU, RAM, event-loop lag and gateway latency on a fixed interval.
+
+    ``window`` seconds of history are kept, so readers only look at buffers
+    and never call psutil themselves.
+    """
+    def __init__(self, gateway_latency: Callable[[], float], interval: float = 10, window: float = 3600):
+        self.gateway_latency = gateway_latency
+        self.interval = interval
+        size = max(1, int(window // interval))
+        self.cpu = RingBuffer(size)
+        self.ram = RingBuffer(size)
+        self.loop_lag = RingBuffer(size)
+        self.gateway = RingBuffer(size)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            import psutil  # Imported on first start, keeping it off the bot's import path
+            psutil.cpu_percent(None)  # Prime the counter; the first reading is always 0.0
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @staticmethod
+    def _read_system() -> Tuple[float, float]:
+        import psutil
+        return psutil.cpu_percent(None), psutil.virtual_memory().percent
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            # How late the loop woke us up is the event-loop lag
+            self.loop_lag.append(max(0.0, time.monotonic() - expected) * 1000)
+            cpu, ram = await asyncio.to_thread(self._read_system)
+            self.cpu.append(cpu)
+            self.ram.append(ram)
+            latency = self.gateway_latency()
+            if math.isfinite(latency):
+                self.gateway.append(latency * 1000)
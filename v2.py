@@ -1,15 +1,30 @@
 import logging
 import re
 import asyncio
+import time
+from fnmatch import fnmatchcase
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 import aiohttp
-from bs4 import BeautifulSoup
 import discord
 from discord.ext import commands
 from discord import ui
 from discord.ui import View, Button
 
-# Configure logging
-logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+from cloudflare_api import CloudflareClient
+from dns_index import RecordIndex
+from dns_sync import DNSSync, VPSEntry
+from inventory import VPSInventory
+from jobs import DONE, FAILED, QUEUED, RUNNING, Job, JobQueue
+from logpipe import fields, log_body, setup_logging
+from metrics import REGISTRY
+from panel_parser import VPSRow, is_success_page, iter_vps_rows, parse_create_page, parse_ssh_page, parse_vps_rows_soup
+from vps_store import VPSStore
+
+# Configure logging: records are queued on the event loop and written by a listener thread
+LOG_LEVEL = logging.INFO  # DEBUG also logs (redacted) panel response bodies
+LOG_FILE = None  # e.g. 'v2.log' to also write a rotating log file
+BODY_LOG_SAMPLE_RATE = 0.0  # Fraction of panel response bodies logged at INFO
+log_listener = setup_logging(LOG_LEVEL, LOG_FILE, BODY_LOG_SAMPLE_RATE)
 logger = logging.getLogger(__name__)
 
 # Bot configuration
@@ -18,36 +33,148 @@ ADMIN_USER_ID = '1405866008127864852'  # Your admin ID
 PANEL_URL = 'http://103.174.247.155:3000'  # GVM Panel link
 PANEL_USER = 'admin'
 PANEL_PASS = ''
-
-# Global session for HTTP requests
-session = None
+LIST_PARSER = 'stream'  # 'stream' (event parser) or 'soup' (BeautifulSoup, <tr> only)
+INVENTORY_TTL = 60  # Seconds before a cached VPS list is revalidated in the background
+INVENTORY_REFRESH_INTERVAL = 120  # Seconds between background VPS list refreshes
+
+PROVISION_WORKERS = 2  # VPS creations sent to the panel at the same time
+JOBS_FILE = 'provision_jobs.json'  # Queued/finished provisioning jobs, kept across restarts
+VPS_DB_FILE = 'vps.db'  # Local store of VPS details (SSH host/port, owner, specs)
+
+# DNS sync: one record per VPS (<label>.<domain> -> SSH host) kept in a Cloudflare zone; empty zone id disables it
+CLOUDFLARE_API_TOKEN = ''
+DNS_SYNC_ZONE_ID = ''
+DNS_SYNC_DOMAIN = 'dragoncloud.qzz.io'
+DNS_SYNC_LABEL = 'vps-{vps_id}'  # Record label; {vps_id} and {name} are filled in
+DNS_SYNC_INTERVAL = 300  # Seconds between sync cycles
+DNS_SYNC_DRY_RUN = True  # Only log the planned changes; set False to apply them
+DNS_SYNC_MAX_CHANGES = 20  # Creates, updates and deletes applied per cycle
+DNS_SYNC_BATCH_SIZE = 5  # Cloudflare calls sent at the same time
+# Guards against a broken VPS list: cycles are refused (until `!dnssync apply force`) when the VPS count
+# drops by more than this share, or when deletes exceed this share of the managed records
+DNS_SYNC_MAX_VPS_DROP = 0.5
+DNS_SYNC_MAX_DELETE_SHARE = 0.25
+DNS_SNAPSHOT_FILE = 'vps_dns_records.json'
+
+METRICS_HOST = '127.0.0.1'  # Prometheus /metrics endpoint; set METRICS_PORT = 0 to disable
+METRICS_PORT = 9102
+
+# Status the VPS list shows once an action succeeds
+ACTION_STATUS = {'start': 'running', 'stop': 'stopped', 'restart': 'running'}
+
+# !bulk: allowed actions, panel calls at the same time, per-VPS timeout and progress edit interval (seconds)
+BULK_ACTIONS = tuple(ACTION_STATUS)
+BULK_CONCURRENCY = 5
+BULK_ACTION_TIMEOUT = 60
+BULK_PROGRESS_INTERVAL = 3
+
+# key=value filters accepted by !bulk and the VPS lists; name accepts * and ? globs
+VPS_FILTER_KEYS = ('status', 'name', 'owner')
+LIST_PAGE_SIZE = 10  # VPS per page of !listall
+LIST_SORT_KEYS = ('id', 'name', 'status', 'memory', 'cpu', 'disk')  # sort=<key>, or sort=-<key> for descending
 
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix='!', intents=intents)
+REGISTRY.gauge('discord_gateway_latency_seconds', lambda: bot.latency)
 
 def is_admin(user_id: str) -> bool:
     return user_id == ADMIN_USER_ID
 
-async def login_to_panel():
-    """Async login to GVM Panel."""
-    global session
-    if session is None or session.closed:
-        session = aiohttp.ClientSession()
-    login_url = f'{PANEL_URL}/login'
-    data = {'username': PANEL_USER, 'password': PANEL_PASS}
-    async with session.post(login_url, data=data) as resp:
-        text = await resp.text()
-        logger.info(f"Login response: {resp.status} - {text[:500]}...")
-        return resp.status == 200 and ('dashboard' in str(resp.url).lower() or 'success' in text.lower())
+# Login form markup means the panel bounced us back to /login
+_LOGIN_FORM_RE = re.compile(r'<form[^>]*action=["\'][^"\']*/login', re.IGNORECASE)
+
+class PanelResponse(NamedTuple):
+    status: int
+    text: str
+    url: str
+
+class PanelClient:
+    """Logged-in GVM Panel session that re-authenticates only when the panel drops it."""
+    def __init__(self, base_url: str, username: str, password: str):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.session = None
+        self.logged_in = False
+        self._login_lock = asyncio.Lock()
+        self._generation = 0  # Bumped on every login attempt
+
+    def _ensure_session(self):
+        if self.session is None or self.session.closed:
+            # unsafe=True so cookies are kept for a panel addressed by bare IP
+            self.session = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+            self.logged_in = False
+
+    async def login(self, stale_generation: Optional[int] = None) -> bool:
+        """Log in to the panel. Concurrent callers share a single login request."""
+        async with self._login_lock:
+            if stale_generation is not None and stale_generation != self._generation and self.logged_in:
+                return True  # Another command re-authenticated while we waited
+            self._ensure_session()
+            data = {'username': self.username, 'password': self.password}
+            with REGISTRY.http('panel', 'POST /login'):
+                async with self.session.post(f'{self.base_url}/login', data=data) as resp:
+                    text = await resp.text()
+            logger.info("Panel login response", extra=fields(status=resp.status))
+            log_body(logger, "Panel login", resp.status, text)
+            self.logged_in = resp.status == 200 and ('dashboard' in str(resp.url).lower() or 'success' in text.lower())
+            self._generation += 1
+            return self.logged_in
+
+    async def ensure_login(self) -> bool:
+        if self.logged_in and self.session is not None and not self.session.closed:
+            return True
+        return await self.login(self._generation)
+
+    @staticmethod
+    def _session_expired(resp: aiohttp.ClientResponse, text: str) -> bool:
+        if resp.status in (401, 403):
+            return True
+        if resp.url.path.rstrip('/').endswith('/login'):
+            return True
+        return _LOGIN_FORM_RE.search(text) is not None
+
+    async def request(self, method: str, path: str, endpoint: Optional[str] = None, **kwargs) -> Optional[PanelResponse]:
+        """Send a panel request, logging in again once if the session has expired.
+
+        ``endpoint`` is the path template used as the metrics label (defaults to path).
+        Returns None when the panel refuses our credentials.
+        """
+        if not await self.ensure_login():
+            return None
+        label = f'{method} {endpoint or path}'
+        for attempt in range(2):
+            generation = self._generation
+            with REGISTRY.http('panel', label) as timer:
+                async with self.session.request(method, f'{self.base_url}{path}', **kwargs) as resp:
+                    text = await resp.text()
+                    timer.failed = resp.status >= 500
+            if self._session_expired(resp, text):
+                if attempt == 1:
+                    # Still bounced to the login page right after logging in: never hand that page to callers
+                    logger.warning("Panel session rejected after re-login", extra=fields(method=method, path=path))
+                    self.logged_in = False
+                    return None
+                logger.info("Panel session expired, logging in again", extra=fields(method=method, path=path))
+                if not await self.login(generation):
+                    return None
+                continue
+            return PanelResponse(resp.status, text, str(resp.url))
+        return None
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.logged_in = False
+
+panel = PanelClient(PANEL_URL, PANEL_USER, PANEL_PASS)
+vps_store = VPSStore(VPS_DB_FILE)
+metrics_runner = None
 
 async def create_vps(name: str, ram: int, cpu: int, disk: int, os: str, user: str, tags: str) -> dict:
     """Create VPS and return dict of details."""
-    if not await login_to_panel():
-        return {"error": "❌ Failed to authenticate with panel. Please check credentials."}
-
-    create_url = f'{PANEL_URL}/create_vps'
     form_data = {
         'name': name,
         'memory': str(ram),
@@ -62,38 +189,42 @@ async def create_vps(name: str, ram: int, cpu: int, disk: int, os: str, user: st
         'custom_docker': '',
         '_token': ''  # Simulated CSRF if needed
     }
-    logger.info(f"Background: Sending create request with data: {form_data}")
-    async with session.post(create_url, data=form_data) as resp:
-        text = await resp.text()
-        logger.info(f"Background: Create response: {resp.status} - {text[:500]}...")
-
-        if resp.status == 200:
-            if any(keyword in text.lower() for keyword in ['successfully', 'created', 'success']):
-                # Multi-line regex to match panel format
-                details = {
-                    'vps_id': re.search(r'VPS ID:\s*[\r\n]+([A-Z0-9]+)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'VPS ID:\s*[\r\n]+([A-Z0-9]+)', text, re.MULTILINE | re.DOTALL) else 'N/A',
-                    'ssh_host': re.search(r'SSH Host:\s*[\r\n]+([\d.]+)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'SSH Host:\s*[\r\n]+([\d.]+)', text, re.MULTILINE | re.DOTALL) else 'N/A',
-                    'ssh_port': re.search(r'SSH Port:\s*[\r\n]+(\d+)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'SSH Port:\s*[\r\n]+(\d+)', text, re.MULTILINE | re.DOTALL) else 'N/A',
-                    'username': re.search(r'Username:\s*[\r\n]+(\w+)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'Username:\s*[\r\n]+(\w+)', text, re.MULTILINE | re.DOTALL) else 'root',
-                    'password': re.search(r'Password:\s*[\r\n]+([^\n]+)', text, re.MULTILINE | re.DOTALL).group(1).strip() if re.search(r'Password:\s*[\r\n]+([^\n]+)', text, re.MULTILINE | re.DOTALL) else 'N/A',
-                    'status': re.search(r'Status:\s*[\r\n]+(\w+)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'Status:\s*[\r\n]+(\w+)', text, re.MULTILINE | re.DOTALL) else 'Running',
-                    'memory': re.search(r'Memory\s*[\r\n]+(\d+\s*GB)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'Memory\s*[\r\n]+(\d+\s*GB)', text, re.MULTILINE | re.DOTALL) else f"{ram} GB",
-                    'cpu': re.search(r'CPU\s*[\r\n]+(\d+\s*Cores)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'CPU\s*[\r\n]+(\d+\s*Cores)', text, re.MULTILINE | re.DOTALL) else f"{cpu} Cores",
-                    'disk': re.search(r'Disk\s*[\r\n]+(\d+\s*GB)', text, re.MULTILINE | re.DOTALL).group(1) if re.search(r'Disk\s*[\r\n]+(\d+\s*GB)', text, re.MULTILINE | re.DOTALL) else f"{disk} GB",
-                    'os': re.search(r'OS\s*[\r\n]+([^\n]+)', text, re.MULTILINE | re.DOTALL).group(1).strip() if re.search(r'OS\s*[\r\n]+([^\n]+)', text, re.MULTILINE | re.DOTALL) else os
-                }
-                ssh_command = f"ssh {details['username']}@{details['ssh_host']} -p {details['ssh_port']}"
-                details['ssh_command'] = ssh_command
-                return details
-            return {"error": "❌ Failed to create VPS. No success indicator in response. Check logs."}
-        return {"error": f"❌ Failed to create VPS. Status: {resp.status}"}
+    logger.info("Sending create request", extra=fields(**form_data))
+    resp = await panel.request('POST', '/create_vps', data=form_data)
+    if resp is None:
+        return {"error": "❌ Failed to authenticate with panel. Please check credentials."}
+    text = resp.text
+    logger.info("Create response", extra=fields(status=resp.status, name=name))
+    log_body(logger, "Create", resp.status, text)
+
+    if resp.status == 200:
+        if is_success_page(text):
+            parsed = parse_create_page(text)
+            details = {
+                'vps_id': parsed.vps_id or 'N/A',
+                'ssh_host': parsed.ssh_host or 'N/A',
+                'ssh_port': parsed.ssh_port or 'N/A',
+                'username': parsed.username or 'root',
+                'password': parsed.password or 'N/A',
+                'status': parsed.status or 'Running',
+                'memory': parsed.memory or f"{ram} GB",
+                'cpu': parsed.cpu or f"{cpu} Cores",
+                'disk': parsed.disk or f"{disk} GB",
+                'os': parsed.os or os
+            }
+            ssh_command = f"ssh {details['username']}@{details['ssh_host']} -p {details['ssh_port']}"
+            details['ssh_command'] = ssh_command
+            if details['vps_id'] != 'N/A':
+                stored = {key: value for key, value in details.items() if key != 'vps_id' and value != 'N/A'}
+                await vps_store.upsert(details['vps_id'], owner=user, name=name, **stored)
+                inventory.invalidate()
+                dns_sync.kick()
+            return details
+        return {"error": "❌ Failed to create VPS. No success indicator in response. Check logs."}
+    return {"error": f"❌ Failed to create VPS. Status: {resp.status}"}
 
 async def add_user(username: str, email: str, password: str, role: str) -> str:
     """Add a new user with email and role (user or admin)."""
-    if not await login_to_panel():
-        return "❌ Failed to authenticate."
-    
-    add_url = f'{PANEL_URL}/users/add'  # Fixed endpoint to avoid 404
     form_data = {
         'username': username,
         'email': email,
@@ -101,73 +232,305 @@ async def add_user(username: str, email: str, password: str, role: str) -> str:
         'role': role.lower(),  # 'user' or 'admin'
         '_token': ''  # Simulated CSRF
     }
-    logger.info(f"Background: Sending add user request with data: {form_data}")
-    async with session.post(add_url, data=form_data) as resp:
-        text = await resp.text()
-        logger.info(f"Background: Add user response: {resp.status} - {text[:200]}...")
-        if resp.status == 200 and any(keyword in text.lower() for keyword in ['success', 'added', 'created']):
-            return f"✅ User '{username}' ({role}) added successfully with email '{email}'."
-        return f"❌ Failed to add user '{username}'. Status: {resp.status}. Check logs."
-
-async def list_vps(own_only: bool = True) -> str:
-    """List VPS with full details - Fixed parsing."""
-    if not await login_to_panel():
+    logger.info("Sending add user request", extra=fields(**form_data))
+    resp = await panel.request('POST', '/users/add', data=form_data)  # Fixed endpoint to avoid 404
+    if resp is None:
+        return "❌ Failed to authenticate."
+    logger.info("Add user response", extra=fields(status=resp.status, username=username))
+    log_body(logger, "Add user", resp.status, resp.text)
+    if resp.status == 200 and any(keyword in resp.text.lower() for keyword in ['success', 'added', 'created']):
+        return f"✅ User '{username}' ({role}) added successfully with email '{email}'."
+    return f"❌ Failed to add user '{username}'. Status: {resp.status}. Check logs."
+
+async def fetch_vps_rows() -> Union[List[VPSRow], str]:
+    """Fetch and parse the panel's VPS table. Returns an error message on failure."""
+    resp = await panel.request('GET', '/vps/list')  # Possible endpoint for VPS list
+    if resp is None:
         return "❌ Failed to authenticate."
-    
-    list_url = f'{PANEL_URL}/vps/list'  # Possible endpoint for VPS list
-    async with session.get(list_url) as resp:
-        if resp.status != 200:
-            logger.warning(f"List VPS fetch failed: {resp.status}")
-            return "❌ Failed to fetch VPS list."
-        text = await resp.text()
-        logger.info(f"Background: List VPS response: {resp.status} - {text[:200]}...")
-        soup = BeautifulSoup(text, 'html.parser')
-        vps_rows = soup.find_all('tr')
-        if not vps_rows:
-            return "No VPS found."
-        
-        message = "📋 VPS List:\n"
-        count = 0
-        for row in vps_rows[1:]:  # Skip header
-            cells = row.find_all('td')
-            if len(cells) >= 6:  # Ensure enough columns
-                vps_id = cells[0].text.strip()
-                name = cells[1].text.strip()
-                status = cells[2].text.strip()
-                memory = cells[3].text.strip()
-                cpu = cells[4].text.strip()
-                disk = cells[5].text.strip()
-                message += f"• **ID:** {vps_id} | **Name:** {name} | **Status:** {status} | **RAM:** {memory} | **CPU:** {cpu} | **Disk:** {disk}\n"
-                count += 1
-                if own_only and count >= 5:  # Limit for own VPS
-                    break
-        return message if message != "📋 VPS List:\n" else "No VPS found."
+    if resp.status != 200:
+        logger.warning("List VPS fetch failed", extra=fields(status=resp.status))
+        return "❌ Failed to fetch VPS list."
+    text = resp.text
+    logger.info("List VPS response", extra=fields(status=resp.status, size=len(text)))
+    log_body(logger, "List VPS", resp.status, text)
+    if LIST_PARSER == 'stream':
+        return list(iter_vps_rows(text))
+    return parse_vps_rows_soup(text)
+
+inventory = VPSInventory(fetch_vps_rows, ttl=INVENTORY_TTL, refresh_interval=INVENTORY_REFRESH_INTERVAL)
+
+def split_options(args: Tuple[str, ...]) -> Tuple[Dict[str, str], List[str]]:
+    """Split command arguments into key=value options and plain values."""
+    options = dict(arg.split('=', 1) for arg in args if '=' in arg)
+    return options, [arg for arg in args if '=' not in arg]
+
+async def filter_vps(rows: List[VPSRow], filters: Dict[str, str]) -> List[VPSRow]:
+    """Rows matching every filter (see VPS_FILTER_KEYS)."""
+    if 'status' in filters:
+        rows = [row for row in rows if row.status.lower() == filters['status'].lower()]
+    if 'name' in filters:
+        rows = [row for row in rows if fnmatchcase(row.name.lower(), filters['name'].lower())]
+    if 'owner' in filters:
+        owned = {details['vps_id'] for details in await vps_store.by_owner(filters['owner'])}
+        rows = [row for row in rows if row.vps_id in owned]
+    return rows
+
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+def _amount(text: str) -> float:
+    # "4 GB" / "2 Cores" -> 4.0 / 2.0, so sizes sort numerically
+    match = _NUMBER_RE.search(text)
+    return float(match.group()) if match else 0.0
+
+def sort_vps(rows: List[VPSRow], sort: str) -> List[VPSRow]:
+    field = sort.lstrip('-')
+    if field in ('memory', 'cpu', 'disk'):
+        key = lambda row: _amount(getattr(row, field))
+    else:
+        attribute = 'vps_id' if field == 'id' else field
+        key = lambda row: getattr(row, attribute).lower()
+    return sorted(rows, key=key, reverse=sort.startswith('-'))
+
+class VPSListView(View):
+    """Pages through VPS rows; each page is rendered from the rows only when it is shown."""
+    def __init__(self, rows: List[VPSRow], author_id: int, title: str = "📋 VPS List", page_size: int = LIST_PAGE_SIZE):
+        super().__init__(timeout=300)
+        self.rows = rows  # Shared VPSRow tuples from the inventory, not copies or rendered text
+        self.author_id = author_id
+        self.title = title
+        self.page_size = page_size
+        self.page = 0
+        self.pages = max(1, -(-len(rows) // page_size))
+        self._update_buttons()
+
+    def embed(self) -> discord.Embed:
+        start = self.page * self.page_size
+        lines = [
+            f"• **{row.vps_id}** | {row.name} | {row.status} | RAM {row.memory} | CPU {row.cpu} | Disk {row.disk}"
+            for row in self.rows[start:start + self.page_size]
+        ]
+        embed = discord.Embed(title=self.title, description="\n".join(lines) or "No VPS found.", color=0x0099ff)
+        embed.set_footer(text=f"Page {self.page + 1}/{self.pages} • {len(self.rows)} VPS")
+        return embed
+
+    def _update_buttons(self):
+        self.prev_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.pages - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the person who ran the command can page this list.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = min(max(page, 0), self.pages - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @ui.button(label='◀ Prev', style=discord.ButtonStyle.grey)
+    async def prev_button(self, interaction: discord.Interaction, button: Button):
+        await self._show(interaction, self.page - 1)
+
+    @ui.button(label='Next ▶', style=discord.ButtonStyle.grey)
+    async def next_button(self, interaction: discord.Interaction, button: Button):
+        await self._show(interaction, self.page + 1)
+
+async def send_vps_list(ctx, args: Tuple[str, ...], limit: Optional[int] = None):
+    """Reply with a paginated VPS list, filtered and sorted by the key=value arguments."""
+    options, _ = split_options(args)
+    sort = options.pop('sort', 'id')
+    unknown = [key for key in options if key not in VPS_FILTER_KEYS]
+    if unknown or sort.lstrip('-') not in LIST_SORT_KEYS:
+        await ctx.send(f"❌ Options: {', '.join(f'{key}=' for key in VPS_FILTER_KEYS)} and sort=[-]{'|'.join(LIST_SORT_KEYS)}")
+        return
+    rows = await inventory.get()
+    if rows is None:
+        await ctx.send(inventory.last_error)
+        return
+    rows = sort_vps(await filter_vps(rows, options), sort)
+    if limit is not None:
+        rows = rows[:limit]
+    view = VPSListView(rows, ctx.author.id)
+    await ctx.send(embed=view.embed(), view=view if view.pages > 1 else None)
 
 async def manage_action(vps_id: str, action: str) -> str:
     """Perform action on VPS (start, stop, etc.)."""
-    if not await login_to_panel():
+    resp = await panel.request('POST', f'/vps/{vps_id}/{action}', endpoint=f'/vps/{{id}}/{action}')
+    if resp is None:
         return "❌ Failed to authenticate."
-    
-    action_url = f'{PANEL_URL}/vps/{vps_id}/{action}'
-    async with session.post(action_url) as resp:
-        text = await resp.text()
-        logger.info(f"Background: Manage action {action} response: {resp.status} - {text[:200]}...")
-        if resp.status == 200 and 'success' in text.lower():
-            return f"✅ VPS {vps_id} {action}ed successfully."
-        return f"❌ Failed to {action} VPS {vps_id}."
+    logger.info("Manage action response", extra=fields(status=resp.status, vps_id=vps_id, action=action))
+    log_body(logger, "Manage action", resp.status, resp.text)
+    if resp.status == 200 and 'success' in resp.text.lower():
+        if action == 'delete':
+            inventory.remove(vps_id)
+            await vps_store.delete(vps_id)
+            dns_sync.kick()
+        elif action == 'reinstall':
+            inventory.invalidate()
+            await vps_store.forget_ssh(vps_id)
+        elif action in ACTION_STATUS:
+            inventory.set_status(vps_id, ACTION_STATUS[action])
+        else:
+            inventory.invalidate()
+        return f"✅ VPS {vps_id} {action}ed successfully."
+    return f"❌ Failed to {action} VPS {vps_id}."
 
 async def get_ssh_info(vps_id: str) -> str:
-    """Get SSH details for VPS."""
-    if not await login_to_panel():
+    """Get SSH details for VPS, from the local store when it has them."""
+    cached = await vps_store.get(vps_id)
+    hit = bool(cached and cached['ssh_host'] and cached['ssh_port'])
+    REGISTRY.cache('vps_store_ssh', hit)
+    if hit:
+        return format_ssh_info(vps_id, cached['ssh_host'], cached['ssh_port'], cached['username'] or 'root')
+
+    resp = await panel.request('GET', f'/vps/{vps_id}/ssh', endpoint='/vps/{id}/ssh')
+    if resp is None:
         return "❌ Failed to authenticate."
-    
-    info_url = f'{PANEL_URL}/vps/{vps_id}/ssh'
-    async with session.get(info_url) as resp:
-        text = await resp.text()
-        logger.info(f"Background: SSH info response: {resp.status} - {text[:200]}...")
-        host = re.search(r'SSH Host:\s*([\d.]+)', text).group(1) if re.search(r'SSH Host:\s*([\d.]+)', text) else 'N/A'
-        port = re.search(r'SSH Port:\s*(\d+)', text).group(1) if re.search(r'SSH Port:\s*(\d+)', text) else 'N/A'
-        return f"🔑 SSH for {vps_id}:\nHost: {host}\nPort: {port}\nCommand: ssh root@{host} -p {port}"
+    text = resp.text
+    logger.info("SSH info response", extra=fields(status=resp.status, vps_id=vps_id))
+    log_body(logger, "SSH info", resp.status, text)
+    info = parse_ssh_page(text)
+    if resp.status == 200 and info.host and info.port:
+        await vps_store.upsert(vps_id, ssh_host=info.host, ssh_port=info.port)
+    return format_ssh_info(vps_id, info.host or 'N/A', info.port or 'N/A')
+
+def format_ssh_info(vps_id: str, host: str, port: str, username: str = 'root') -> str:
+    return f"🔑 SSH for {vps_id}:\nHost: {host}\nPort: {port}\nCommand: ssh {username}@{host} -p {port}"
+
+def vps_details_embed(name: str, details: dict) -> discord.Embed:
+    dm_embed = discord.Embed(title=f"🔒 VPS Details for {name}", color=0x00ff00)
+    dm_embed.add_field(name="VPS ID", value=details['vps_id'], inline=True)
+    dm_embed.add_field(name="Username", value=details['username'], inline=True)
+    dm_embed.add_field(name="Password", value=details['password'], inline=True)
+    dm_embed.add_field(name="SSH Host", value=details['ssh_host'], inline=True)
+    dm_embed.add_field(name="SSH Port", value=details['ssh_port'], inline=True)
+    dm_embed.add_field(name="Status", value=details['status'], inline=True)
+    dm_embed.add_field(name="SSH Command", value=details['ssh_command'], inline=False)
+    dm_embed.add_field(name="Memory", value=details['memory'], inline=True)
+    dm_embed.add_field(name="CPU", value=details['cpu'], inline=True)
+    dm_embed.add_field(name="Disk", value=details['disk'], inline=True)
+    dm_embed.add_field(name="OS", value=details['os'], inline=True)
+    return dm_embed
+
+def describe_job(job: Job) -> str:
+    line = f"• **#{job.job_id}** {job.kind} `{job.params.get('name', '')}` — {job.status}"
+    if job.status == RUNNING and job.started_at:
+        line += f" for {int(time.time() - job.started_at)}s"
+    if job.vps_id:
+        line += f" | VPS {job.vps_id}"
+    if job.error:
+        line += f" | {job.error}"
+    return line
+
+async def edit_job_message(job: Job, content: str):
+    """Edit the message the job was requested from; works after a restart too."""
+    try:
+        channel = bot.get_channel(job.channel_id) or await bot.fetch_channel(job.channel_id)
+        await channel.get_partial_message(job.message_id).edit(content=content)
+    except discord.HTTPException as e:
+        logger.warning(f"Could not update message for job #{job.job_id}: {e}")
+
+async def run_provision_job(job: Job):
+    params = job.params
+    await edit_job_message(job, f"🔄 Creating VPS {params['name']}... (job #{job.job_id})")
+    try:
+        details = await create_vps(**params)
+    except Exception as e:
+        # Panel down or timed out: the worker would mark the job failed, but the user must see it too
+        logger.error(f"Job #{job.job_id} create of {params['name']} failed: {type(e).__name__}: {e}")
+        details = {"error": f"❌ Panel error while creating VPS {params['name']}; check the panel before retrying."}
+    if "error" in details:
+        job.error = details["error"]
+        await edit_job_message(job, f"{details['error']} (job #{job.job_id})")
+        return
+    job.vps_id = details['vps_id']
+    inventory.invalidate()
+    await edit_job_message(job, f"✅ VPS Created Successfully! (job #{job.job_id})")
+    try:
+        author = bot.get_user(job.author_id) or await bot.fetch_user(job.author_id)
+        await author.send(embed=vps_details_embed(params['name'], details))
+    except discord.HTTPException as e:
+        logger.warning(f"Could not DM VPS details for job #{job.job_id}: {e}")
+
+async def recover_provision_job(job: Job) -> bool:
+    """Decide what to do with a create that was running when the bot stopped."""
+    rows = await inventory.get()
+    if rows is None:
+        job.error = "❌ Interrupted by a bot restart; check the panel before retrying."
+    else:
+        named = [row for row in rows if row.name == job.params['name']]
+        if not named:
+            return True  # The panel never got it, run it again
+        # Names aren't unique: only trust a VPS stored for this owner that no other job already claims
+        claimed = {other.vps_id for other in provision_queue.jobs.values() if other.vps_id}
+        owned = []
+        for row in named:
+            stored = await vps_store.get(row.vps_id)
+            if stored and stored.get('owner') == job.params['user'] and row.vps_id not in claimed:
+                owned.append(row)
+        if len(owned) == 1:
+            job.vps_id = owned[0].vps_id
+        else:
+            job.error = (f"❌ Interrupted by a bot restart and VPS {job.params['name']} can't be matched "
+                         f"to this job; check the panel before retrying.")
+    job.status = FAILED if job.error else DONE
+    job.finished_at = time.time()
+    if job.error:
+        await edit_job_message(job, f"{job.error} (job #{job.job_id})")
+    else:
+        await edit_job_message(job, f"✅ VPS {job.vps_id} was created before the bot restarted (job #{job.job_id}).")
+    return False
+
+provision_queue = JobQueue(JOBS_FILE, run_provision_job, workers=PROVISION_WORKERS)
+
+async def dns_sync_entries() -> Optional[List[VPSEntry]]:
+    """Every VPS with its stored SSH host, or None if the panel list can't be trusted right now."""
+    if inventory.rows is None or inventory.age > inventory.ttl:
+        await inventory.refresh()
+    # An empty list is far more likely a maintenance page or layout change than a panel with no VPS
+    if not inventory.rows or inventory.last_error:
+        return None
+    hosts = {details['vps_id']: details['ssh_host'] for details in await vps_store.all()}
+    return [(row.vps_id, row.name, hosts.get(row.vps_id)) for row in inventory.rows.values()]
+
+cloudflare = CloudflareClient(CLOUDFLARE_API_TOKEN)
+dns_records = RecordIndex(cloudflare, DNS_SNAPSHOT_FILE)
+dns_sync = DNSSync(dns_records, DNS_SYNC_ZONE_ID, DNS_SYNC_DOMAIN, dns_sync_entries, label=DNS_SYNC_LABEL,
+                   interval=DNS_SYNC_INTERVAL, dry_run=DNS_SYNC_DRY_RUN, max_changes=DNS_SYNC_MAX_CHANGES,
+                   batch_size=DNS_SYNC_BATCH_SIZE, max_vps_drop=DNS_SYNC_MAX_VPS_DROP,
+                   max_delete_share=DNS_SYNC_MAX_DELETE_SHARE)
+
+# Per-VPS locks and in-flight panel calls, so repeated clicks share one request
+_vps_locks: Dict[str, asyncio.Lock] = {}
+_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+async def _single_flight(vps_id: str, action: str, call: Callable[[], Awaitable[str]], exclusive: bool) -> str:
+    key = (vps_id, action)
+    task = _inflight.get(key)
+    if task is None:
+        async def run() -> str:
+            # Errors become a reply here: a caller that timed out may no longer be waiting to see them
+            try:
+                if not exclusive:
+                    return await call()
+                async with _vps_locks.setdefault(vps_id, asyncio.Lock()):
+                    return await call()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Panel {action} of VPS {vps_id} failed: {type(e).__name__}: {e}")
+                return f"❌ Panel error while trying to {action} VPS {vps_id}."
+        task = asyncio.create_task(run())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one caller giving up doesn't cancel the request others are waiting on
+    return await asyncio.shield(task)
+
+async def vps_action(vps_id: str, action: str) -> str:
+    """manage_action, one at a time per VPS; an identical action already in flight is joined."""
+    return await _single_flight(vps_id, action, lambda: manage_action(vps_id, action), exclusive=True)
+
+async def vps_ssh_info(vps_id: str) -> str:
+    return await _single_flight(vps_id, 'ssh', lambda: get_ssh_info(vps_id), exclusive=False)
 
 class ManageView(View):
     """Interactive buttons for manage command."""
@@ -175,40 +538,131 @@ class ManageView(View):
         super().__init__(timeout=300)
         self.vps_id = vps_id
 
+    async def _respond(self, interaction: discord.Interaction, call: Callable[[], Awaitable[str]]):
+        # Acknowledge first: the panel can take longer than Discord's 3 s interaction deadline.
+        # The panel call is only started once that worked, so a failed defer leaves nothing running.
+        try:
+            await interaction.response.defer(ephemeral=True, thinking=True)
+        except discord.HTTPException as e:
+            logger.warning(f"Could not acknowledge button on VPS {self.vps_id}: {e}")
+            return
+        try:
+            reply = await call()
+        except Exception as e:
+            logger.error(f"Button on VPS {self.vps_id} failed: {e}")
+            reply = f"❌ Something went wrong with VPS {self.vps_id}: {e}"
+        await interaction.followup.send(reply, ephemeral=True)
+
     @ui.button(label='Start', style=discord.ButtonStyle.green)
     async def start_button(self, interaction: discord.Interaction, button: Button):
-        result = await manage_action(self.vps_id, 'start')
-        await interaction.response.send_message(result, ephemeral=True)
+        await self._respond(interaction, lambda: vps_action(self.vps_id, 'start'))
 
     @ui.button(label='Stop', style=discord.ButtonStyle.red)
     async def stop_button(self, interaction: discord.Interaction, button: Button):
-        result = await manage_action(self.vps_id, 'stop')
-        await interaction.response.send_message(result, ephemeral=True)
+        await self._respond(interaction, lambda: vps_action(self.vps_id, 'stop'))
 
     @ui.button(label='Restart', style=discord.ButtonStyle.blurple)
     async def restart_button(self, interaction: discord.Interaction, button: Button):
-        result = await manage_action(self.vps_id, 'restart')
-        await interaction.response.send_message(result, ephemeral=True)
+        await self._respond(interaction, lambda: vps_action(self.vps_id, 'restart'))
 
     @ui.button(label='Reinstall', style=discord.ButtonStyle.grey)
     async def reinstall_button(self, interaction: discord.Interaction, button: Button):
-        result = await manage_action(self.vps_id, 'reinstall')
-        await interaction.response.send_message(result, ephemeral=True)
+        await self._respond(interaction, lambda: vps_action(self.vps_id, 'reinstall'))
 
     @ui.button(label='SSH Info', style=discord.ButtonStyle.primary)
     async def ssh_button(self, interaction: discord.Interaction, button: Button):
-        result = await get_ssh_info(self.vps_id)
-        await interaction.response.send_message(result, ephemeral=True)
+        await self._respond(interaction, lambda: vps_ssh_info(self.vps_id))
+
+async def select_vps(filters: Dict[str, str]) -> Union[List[str], str]:
+    """IDs of inventory VPS matching every filter, or an error message."""
+    rows = await inventory.get()
+    if rows is None:
+        return inventory.last_error
+    return [row.vps_id for row in await filter_vps(rows, filters)]
+
+async def run_bulk_action(ctx, action: str, vps_ids: List[str]):
+    """Run one action over many VPS with bounded concurrency, editing a single progress message."""
+    results: Dict[str, str] = {}
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+    progress = await ctx.send(f"⏳ Bulk {action}: 0/{len(vps_ids)}")
+
+    def failures() -> List[str]:
+        return [vps_id for vps_id, result in results.items() if not result.startswith('✅')]
+
+    async def run_one(vps_id: str):
+        async with semaphore:
+            call = asyncio.ensure_future(vps_action(vps_id, action))
+            try:
+                results[vps_id] = await asyncio.wait_for(asyncio.shield(call), BULK_ACTION_TIMEOUT)
+            except asyncio.TimeoutError:
+                results[vps_id] = f"❌ VPS {vps_id} timed out after {BULK_ACTION_TIMEOUT}s."
+            except Exception as e:
+                logger.error(f"Bulk {action} of {vps_id} failed: {e}")
+                results[vps_id] = f"❌ VPS {vps_id}: {type(e).__name__}."
+            if not call.done():
+                # A timeout only stops waiting; keep the slot until the panel call ends so a slow
+                # panel never sees more than BULK_CONCURRENCY requests from one bulk run
+                try:
+                    late = await call
+                    logger.warning(f"Bulk {action} of {vps_id} finished after timing out: {late}")
+                except Exception as e:
+                    logger.error(f"Bulk {action} of {vps_id} failed after timing out: {e}")
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(BULK_PROGRESS_INTERVAL)
+            try:
+                await progress.edit(content=f"⏳ Bulk {action}: {len(results)}/{len(vps_ids)} ({len(failures())} failed)")
+            except discord.HTTPException as e:
+                logger.warning(f"Bulk {action} progress update failed: {e}")
+
+    reporter = asyncio.create_task(report_progress())
+    try:
+        await asyncio.gather(*(run_one(vps_id) for vps_id in vps_ids))
+    finally:
+        reporter.cancel()
+
+    failed = failures()
+    summary = f"{'✅' if not failed else '⚠️'} Bulk {action}: {len(vps_ids) - len(failed)} succeeded, {len(failed)} failed."
+    if failed:
+        summary += "\n" + "\n".join(results[vps_id] for vps_id in failed)
+    try:
+        await progress.edit(content=summary[:1900])
+    except discord.HTTPException as e:
+        logger.warning(f"Bulk {action} summary edit failed, sending it instead: {e}")
+        await ctx.send(summary[:1900])
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.metrics_timer = REGISTRY.command(ctx.command.qualified_name)
+
+@bot.after_invoke
+async def stop_command_timer(ctx):
+    timer = getattr(ctx, 'metrics_timer', None)
+    if timer is not None:
+        timer.finish(failed=ctx.command_failed)
 
 @bot.event
 async def on_ready():
-    global session
-    session = aiohttp.ClientSession()
+    # Fires again after every gateway reconnect: reuse the panel session and skip anything already running
+    global metrics_runner
     logger.info(f'{bot.user} has connected to Discord!')
-    if not await login_to_panel():
-        logger.error("Initial login failed. Check credentials.")
-    else:
-        logger.info("🖥️ GVM Panel CMD Running - Bot online!")
+    try:
+        if not await panel.ensure_login():
+            logger.error("Initial login failed. Check credentials.")
+        else:
+            logger.info("🖥️ GVM Panel CMD Running - Bot online!")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # A panel that is down at boot must not keep the queue, inventory and metrics from starting
+        logger.error(f"Initial login failed, panel unreachable: {type(e).__name__}: {e}")
+    inventory.start()
+    if METRICS_PORT and metrics_runner is None:
+        metrics_runner = await REGISTRY.serve(METRICS_HOST, METRICS_PORT)
+    if not provision_queue.started:
+        await provision_queue.start(recover_provision_job)
+    if DNS_SYNC_ZONE_ID and not dns_sync.started:
+        await dns_records.start([DNS_SYNC_ZONE_ID])
+        dns_sync.start()
 
 @bot.command()
 async def ping(ctx):
@@ -221,15 +675,17 @@ async def botinfo(ctx):
     await ctx.send('🤖 GVM VPS Bot\nVersion: 1.0')
 
 @bot.command()
-async def listvps(ctx):
+async def listvps(ctx, *options: str):
+    """List VPS. Usage: !listvps [status=...] [name=...] [sort=[-]key]"""
     logger.info(f"Background: Processing listvps command from {ctx.author}")
-    await ctx.send(await list_vps(own_only=True))
+    await send_vps_list(ctx, options, limit=5)  # Limit for own VPS
 
 @bot.command()
-async def listall(ctx):
+async def listall(ctx, *options: str):
+    """List every VPS, 10 per page (admin only). Usage: !listall [status=...] [name=...] [owner=...] [sort=[-]key]"""
     logger.info(f"Background: Processing listall command from {ctx.author}")
     if is_admin(str(ctx.author.id)):
-        await ctx.send(await list_vps(own_only=False))
+        await send_vps_list(ctx, options)
     else:
         await ctx.send("❌ Access denied. Admin only.")
 
@@ -239,30 +695,41 @@ async def createvps(ctx, name: str, ram: int, cpu: int, disk: int, os: str, user
     if not is_admin(str(ctx.author.id)):
         await ctx.send("❌ Access denied. Admin only.")
         return
-    
-    msg = await ctx.send("🔄 Creating VPS... (Processing)")
-    await asyncio.sleep(10)
-    
-    details = await create_vps(name, ram, cpu, disk, os, user, tags)
-    if "error" in details:
-        await msg.edit(content=details["error"])
+    if not provision_queue.started:
+        await ctx.send("⏳ The bot is still starting up, nothing was queued. Try again in a moment.")
         return
-    
-    await msg.edit(content="✅ VPS Created Successfully!")
-    
-    dm_embed = discord.Embed(title=f"🔒 VPS Details for {name}", color=0x00ff00)
-    dm_embed.add_field(name="VPS ID", value=details['vps_id'], inline=True)
-    dm_embed.add_field(name="Username", value=details['username'], inline=True)
-    dm_embed.add_field(name="Password", value=details['password'], inline=True)
-    dm_embed.add_field(name="SSH Host", value=details['ssh_host'], inline=True)
-    dm_embed.add_field(name="SSH Port", value=details['ssh_port'], inline=True)
-    dm_embed.add_field(name="Status", value=details['status'], inline=True)
-    dm_embed.add_field(name="SSH Command", value=details['ssh_command'], inline=False)
-    dm_embed.add_field(name="Memory", value=details['memory'], inline=True)
-    dm_embed.add_field(name="CPU", value=details['cpu'], inline=True)
-    dm_embed.add_field(name="Disk", value=details['disk'], inline=True)
-    dm_embed.add_field(name="OS", value=details['os'], inline=True)
-    await ctx.author.send(embed=dm_embed)
+
+    msg = await ctx.send(f"🕒 Queuing VPS {name}...")
+    params = {'name': name, 'ram': ram, 'cpu': cpu, 'disk': disk, 'os': os, 'user': user, 'tags': tags}
+    job = await provision_queue.submit('create_vps', params, ctx.author.id, ctx.channel.id, msg.id)
+    if job.status == QUEUED:
+        await msg.edit(content=f"🕒 VPS {name} queued as job #{job.job_id} (position {provision_queue.position(job)}).")
+
+@bot.command()
+async def jobs(ctx, job_id: int = None):
+    """Show provisioning jobs (admin only). Usage: !jobs [job id]"""
+    logger.info(f"Background: Processing jobs command from {ctx.author}")
+    if not is_admin(str(ctx.author.id)):
+        await ctx.send("❌ Access denied. Admin only.")
+        return
+    if job_id is not None:
+        job = provision_queue.jobs.get(job_id)
+        await ctx.send(describe_job(job) if job else f"❌ No job #{job_id}.")
+        return
+    counts = " | ".join(f"{status}: {len(provision_queue.by_status(status))}" for status in (QUEUED, RUNNING, DONE, FAILED))
+    recent = list(provision_queue.jobs.values())[-10:]
+    lines = [f"📦 Provisioning jobs ({counts})"] + [describe_job(job) for job in reversed(recent)]
+    await ctx.send("\n".join(lines) if recent else "📦 No provisioning jobs.")
+
+@bot.command()
+async def stats(ctx):
+    """Show command, panel and cache latency stats (admin only)."""
+    logger.info(f"Background: Processing stats command from {ctx.author}")
+    if not is_admin(str(ctx.author.id)):
+        await ctx.send("❌ Access denied. Admin only.")
+        return
+    lines = REGISTRY.summary() or ["No requests recorded yet."]
+    await ctx.send("📊 **Bot stats**\n" + "\n".join(lines)[:1900])
 
 @bot.command()
 async def adduser(ctx, username: str, email: str, password: str, role: str):
@@ -283,9 +750,67 @@ async def deletevps(ctx, vps_id: str):
     if not is_admin(str(ctx.author.id)):
         await ctx.send("❌ Access denied. Admin only.")
         return
-    result = await manage_action(vps_id, 'delete')
+    result = await vps_action(vps_id, 'delete')
     await ctx.send(result)
 
+@bot.command()
+async def bulk(ctx, action: str = None, *targets: str):
+    """Run an action on many VPS (admin only). Usage: !bulk <start|stop|restart> <id...> or <status=|name=|owner=...>"""
+    logger.info(f"Background: Processing bulk command from {ctx.author}")
+    if not is_admin(str(ctx.author.id)):
+        await ctx.send("❌ Access denied. Admin only.")
+        return
+    usage = f"Usage: `!bulk <{'|'.join(BULK_ACTIONS)}> <id...>` or `!bulk <action> status=running name=web-* owner=<user>`"
+    if action not in BULK_ACTIONS or not targets:
+        await ctx.send(f"❌ {usage}")
+        return
+
+    filters, vps_ids = split_options(targets)
+    unknown = [key for key in filters if key not in VPS_FILTER_KEYS]
+    if unknown:
+        await ctx.send(f"❌ Unknown filter {', '.join(unknown)}. Filters: {', '.join(VPS_FILTER_KEYS)}.")
+        return
+    if filters and vps_ids:
+        await ctx.send(f"❌ Give either VPS IDs or filters, not both.\n{usage}")
+        return
+    if filters:
+        selected = await select_vps(filters)
+        if isinstance(selected, str):
+            await ctx.send(selected)
+            return
+        vps_ids = selected
+    vps_ids = list(dict.fromkeys(vps_ids))  # Drop repeated IDs, keep order
+    if not vps_ids:
+        await ctx.send("⚠️ No VPS matched.")
+        return
+    await run_bulk_action(ctx, action, vps_ids)
+
+@bot.command()
+async def dnssync(ctx, *options: str):
+    """Preview the VPS DNS sync, or run one cycle now (admin only). Usage: !dnssync [apply] [force]"""
+    logger.info(f"Background: Processing dnssync command from {ctx.author}")
+    if not is_admin(str(ctx.author.id)):
+        await ctx.send("❌ Access denied. Admin only.")
+        return
+    if not DNS_SYNC_ZONE_ID:
+        await ctx.send("⚠️ DNS sync is disabled. Set DNS_SYNC_ZONE_ID to enable it.")
+        return
+    report = await dns_sync.run_once(dry_run='apply' not in options, force='force' in options)
+    if report is None and dns_sync.blocked:
+        await ctx.send(f"🛑 DNS sync refused: {dns_sync.blocked}. If that is expected, run `!dnssync apply force`.")
+        return
+    if report is None:
+        await ctx.send("❌ VPS list or DNS records are not available yet, try again shortly.")
+        return
+    if report.dry_run:
+        header = f"🌐 DNS sync preview: {len(report.changes)} change(s) (`!dnssync apply` to run them)"
+    else:
+        header = f"🌐 DNS sync: {report.applied} applied, {report.failed} failed"
+    if report.deferred:
+        header += f", {report.deferred} more left for the next cycle"
+    lines = [header] + [change.describe() for change in report.changes]
+    await ctx.send("\n".join(lines)[:1900] if report.changes else "✅ DNS records already match the VPS list.")
+
 @bot.command()
 async def addadmin(ctx, username: str):
     logger.info(f"Background: Processing addadmin command from {ctx.author}")
@@ -307,11 +832,23 @@ async def manage(ctx, vps_id: str):
     logger.info(f"Background: Processing manage command from {ctx.author}")
     view = ManageView(vps_id)
     embed = discord.Embed(title=f"🔧 Manage VPS {vps_id}", description="Click a button below:", color=0x0099ff)
+    details = await vps_store.get(vps_id)
+    if details:
+        for label, key in (("Name", 'name'), ("Owner", 'owner'), ("OS", 'os'), ("SSH Host", 'ssh_host'), ("SSH Port", 'ssh_port')):
+            if details[key]:
+                embed.add_field(name=label, value=details[key], inline=True)
     await ctx.send(embed=embed, view=view)
 
 async def close_session():
-    if session and not session.closed:
-        await session.close()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    provision_queue.stop()
+    inventory.stop()
+    dns_sync.stop()
+    await dns_records.stop()
+    await cloudflare.close()
+    await panel.close()
+    vps_store.close()
 
 @bot.event
 async def on_close():
@@ -319,11 +856,12 @@ async def on_close():
 
 def main():
     try:
-        bot.run(BOT_TOKEN)
+        bot.run(BOT_TOKEN, log_handler=None)  # Keep discord.py on our queued handler
     except Exception as e:
         logger.error(f"Bot failed to start: {e}")
     finally:
         asyncio.run(close_session())
+        log_listener.stop()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,77 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+# Passwords are deliberately not stored; they are only ever sent in the creation DM
+DETAIL_FIELDS = ('owner', 'name', 'ssh_host', 'ssh_port', 'username', 'status', 'memory', 'cpu', 'disk', 'os')
+SSH_FIELDS = ('ssh_host', 'ssh_port', 'username')
+
+_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS vps (
+    vps_id TEXT PRIMARY KEY,
+    {', '.join(f'{name} TEXT' for name in DETAIL_FIELDS)},
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vps_owner ON vps (owner);
+'''
+
+
+class VPSStore:
+    """Local SQLite cache of VPS details, looked up by VPS id or by owner.
+
+    Queries run in a worker thread so disk syncs never block the event loop.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(_SCHEMA)
+
+    def _execute(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock, self._db:
+            return self._db.execute(sql, params).fetchall()
+
+    async def _run(self, sql: str, params=()) -> List[sqlite3.Row]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def get(self, vps_id: str) -> Optional[dict]:
+        rows = await self._run('SELECT * FROM vps WHERE vps_id = ?', (vps_id,))
+        return dict(rows[0]) if rows else None
+
+    async def by_owner(self, owner: str) -> List[dict]:
+        rows = await self._run('SELECT * FROM vps WHERE owner = ? ORDER BY vps_id', (owner,))
+        return [dict(row) for row in rows]
+
+    async def all(self) -> List[dict]:
+        rows = await self._run('SELECT * FROM vps')
+        return [dict(row) for row in rows]
+
+    async def upsert(self, vps_id: str, **details):
+        """Insert or update a VPS, only touching the fields given (None values are skipped)."""
+        details = {name: value for name, value in details.items() if name in DETAIL_FIELDS and value is not None}
+        columns = ['vps_id', *details, 'updated_at']
+        updates = ', '.join(f'{name} = excluded.{name}' for name in columns[1:])
+        await self._run(
+            f'INSERT INTO vps ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))}) '
+            f'ON CONFLICT (vps_id) DO UPDATE SET {updates}',
+            (vps_id, *details.values(), time.time()),
+        )
+
+    async def forget_ssh(self, vps_id: str):
+        """Drop cached connection details, e.g. after a reinstall."""
+        await self._run(
+            f'UPDATE vps SET {", ".join(f"{name} = NULL" for name in SSH_FIELDS)}, updated_at = ? WHERE vps_id = ?',
+            (time.time(), vps_id),
+        )
+
+    async def delete(self, vps_id: str):
+        await self._run('DELETE FROM vps WHERE vps_id = ?', (vps_id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()